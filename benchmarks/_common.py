@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+'''Helpers shared by benchmark scripts.'''
+import os
+import sys
+import resource
+import timeit
+
+
+SIZES = [1000, 10000, 100000]
+
+
+def fill_manager(manager, n):
+    '''Append **n** typical result items to **manager**.'''
+    for i in range(n):
+        manager.append_item('title {0}'.format(i), 'icon.png',
+                            subtitle='~/path/to/file_{0} & more'.format(i),
+                            uid='uid{0}'.format(i),
+                            arg='~/path/to/file_{0}'.format(i),
+                            valid=True, autocomplete='title {0}'.format(i),
+                            icon_type='fileicon', is_file=True)
+
+    return manager
+
+
+def best_of(func, repeat=3, number=1):
+    '''
+    Return the best elapsed seconds of **func**.
+
+    Args:
+        func (callable): function to measure.
+        repeat (int, optional): number of measurements.
+        number (int, optional): number of calls in each measurement.
+
+    Returns:
+        float: seconds per one call.
+    '''
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def peak_memory(func):
+    '''
+    Return growth of peak RSS while running **func** in a forked process.
+
+    Args:
+        func (callable): function to measure.
+
+    Returns:
+        int: growth of peak RSS (KiB).
+    '''
+    r, w = os.pipe()
+    pid = os.fork()
+
+    if pid == 0:
+        os.close(r)
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        func()
+        after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        os.write(w, str(after - before).encode('ascii'))
+        os._exit(0)
+
+    os.close(w)
+    data = os.read(r, 64)
+    os.close(r)
+    os.waitpid(pid, 0)
+
+    kib = int(data)
+    if sys.platform == 'darwin':
+        # ru_maxrss is bytes on OS X.
+        kib //= 1024
+
+    return kib
+
+
+def report(title, header, rows):
+    '''Print benchmark result as a simple table.'''
+    print(title)
+    print(' | '.join('{0:>14}'.format(h) for h in header))
+    for row in rows:
+        print(' | '.join(
+            '{0:>14.6f}'.format(c) if isinstance(c, float)
+            else '{0:>14}'.format(c) for c in row
+        ))
+    print('')
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+'''
+Perceived latency of run_budgeted() compared with waiting for all
+records of a slow data source.
+
+Usage::
+
+    python -m benchmarks.bench_budget
+'''
+import os
+import time
+import shutil
+import tempfile
+from workflows.cache import ResultCache
+from workflows.script_filter import ScriptFilterManager, hash_uid
+from ._common import SIZES, report
+
+
+BUDGET = 0.1
+
+# seconds to produce one record. (ex. stat of a file)
+COST = 0.00002
+
+
+def records(n):
+    for i in range(n):
+        end = time.time() + COST
+        while time.time() < end:
+            pass
+        yield ('title {0}'.format(i), 'icon.png', '~/file_{0}'.format(i))
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    null = open(os.devnull, 'w')
+    try:
+        cache = ResultCache(directory)
+        rows = []
+        for n in SIZES:
+            start = time.time()
+            manager = ScriptFilterManager(uid_strategy=hash_uid)
+            manager.extend_items(records(n))
+            null.write(manager.tojson())
+            full = time.time() - start
+
+            start = time.time()
+            complete = ScriptFilterManager(uid_strategy=hash_uid).run_budgeted(
+                records(n), BUDGET, cache, 'bench', str(n), fp=null)
+            first = time.time() - start
+
+            # wait for the background process.
+            while cache.get('bench', str(n)) is None:
+                time.sleep(0.05)
+            done = time.time() - start
+
+            start = time.time()
+            ScriptFilterManager(uid_strategy=hash_uid).run_budgeted(
+                records(n), BUDGET, cache, 'bench', str(n), fp=null)
+            rerun = time.time() - start
+
+            rows.append([n, full, first, 'yes' if complete else 'no',
+                         done, rerun])
+    finally:
+        null.close()
+        shutil.rmtree(directory)
+
+    report('budget {0}s'.format(BUDGET),
+           ['records', 'full (s)', 'first output', 'complete',
+            'cache filled', 'rerun'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+'''
+Compare hit latency of caches from a cold cache object, as a script
+filter process does on every keystroke.
+
+Usage::
+
+    python -m benchmarks.bench_cache
+'''
+import os
+import json
+import pickle
+import shutil
+import tempfile
+from workflows.cache import ResultCache, MappedResultCache
+from workflows.script_filter import ScriptFilterManager
+from ._common import fill_manager, best_of, report
+
+
+ENTRIES = [100, 1000, 5000]
+
+
+class JSONFileCache(object):
+    '''All entries in one JSON file.'''
+    def __init__(self, path):
+        self._path = path
+
+    def set_all(self, entries):
+        with open(self._path, 'w') as f:
+            json.dump(entries, f)
+
+    def get(self, query):
+        with open(self._path) as f:
+            return json.load(f).get(query)
+
+
+class PickleFileCache(JSONFileCache):
+    '''All entries in one pickle file.'''
+    def set_all(self, entries):
+        with open(self._path, 'wb') as f:
+            pickle.dump(entries, f, pickle.HIGHEST_PROTOCOL)
+
+    def get(self, query):
+        with open(self._path, 'rb') as f:
+            return pickle.load(f).get(query)
+
+
+def main():
+    data = fill_manager(ScriptFilterManager(), 20).tostring()
+    rows = []
+
+    for n in ENTRIES:
+        directory = tempfile.mkdtemp()
+        try:
+            queries = ['query {0}'.format(i) for i in range(n)]
+
+            mapped = MappedResultCache(os.path.join(directory, 'mapped'))
+            files = ResultCache(os.path.join(directory, 'files'),
+                                max_entries=n)
+            for q in queries:
+                mapped.set('wf', q, data)
+                files.set('wf', q, data)
+
+            by_json = JSONFileCache(os.path.join(directory, 'cache.json'))
+            by_json.set_all(dict((q, data) for q in queries))
+            by_pickle = PickleFileCache(os.path.join(directory, 'cache.pkl'))
+            by_pickle.set_all(dict((q, data) for q in queries))
+
+            q = queries[n // 2]
+            rows.append([
+                n,
+                best_of(lambda: MappedResultCache(
+                    os.path.join(directory, 'mapped')).get('wf', q), 20),
+                best_of(lambda: ResultCache(
+                    os.path.join(directory, 'files')).get('wf', q), 20),
+                best_of(lambda: by_json.get(q), 5),
+                best_of(lambda: by_pickle.get(q), 5),
+            ])
+        finally:
+            shutil.rmtree(directory)
+
+    report('cold hit latency ({0} bytes / entry)'.format(len(data)),
+           ['entries', 'mapped (s)', 'file/entry (s)', 'json (s)',
+            'pickle (s)'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
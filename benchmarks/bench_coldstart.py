@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+'''
+Compare cold start of a workflow packaged as python sources, as
+bytecode without sources, and as a zipimport bundle.
+
+The workflow vendors the workflows package, like examples/date. Each
+package is built by examples/shovel/_package.py, extracted, and a new
+process imports the script filter from it. Bytecode is not written
+(ex. read-only workflow directory), so sources are compiled on each run
+unless bytecode cache was written by a previous run.
+
+Usage::
+
+    python -m benchmarks.bench_coldstart
+'''
+import os
+import sys
+import time
+import shutil
+import zipfile
+import tempfile
+import subprocess
+from ._common import report
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(top_dir, 'examples', 'shovel'))
+
+from _package import Packager, collect, compile_files, bundle_files  # noqa
+
+APP = 'app'
+
+COMMAND = '''# -*- coding: utf-8 -*-
+import app.workflows.script_filter as sf
+
+
+def main():
+    manager = sf.ScriptFilterManager()
+    manager.append_item('title', 'icon.png', uid='uid')
+    return manager.tostring()
+'''
+
+SCRIPT = 'from app.command import main; main()'
+
+REPEAT = 20
+
+
+def build(work_dir, mode):
+    '''Build package of **mode**, and return the extracted directory.'''
+    src = os.path.join(work_dir, 'src')
+    if not os.path.isdir(src):
+        shutil.copytree(os.path.join(top_dir, 'workflows'),
+                        os.path.join(src, 'workflows'),
+                        ignore=shutil.ignore_patterns('*.pyc', '__pycache__'))
+        open(os.path.join(src, '__init__.py'), 'w').close()
+        with open(os.path.join(src, 'command.py'), 'w') as f:
+            f.write(COMMAND)
+
+    build_dir = os.path.join(work_dir, '_build')
+    files = collect([(src, APP)])
+    if mode == 'bytecode':
+        files = compile_files(files, build_dir)
+    elif mode == 'bundle':
+        files = bundle_files(files, APP, build_dir)
+
+    archive = os.path.join(work_dir, mode + '.alfredworkflow')
+    Packager(build_dir).build(archive, files)
+
+    out = os.path.join(work_dir, mode)
+    z = zipfile.ZipFile(archive)
+    z.extractall(out)
+    z.close()
+
+    return out
+
+
+def run(directory, code=SCRIPT, repeat=REPEAT, cache=False):
+    '''Return median seconds of running **code** in **directory**.'''
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    if cache:
+        # the first run writes bytecode cache.
+        writable = dict(env)
+        del writable['PYTHONDONTWRITEBYTECODE']
+        subprocess.check_call([sys.executable, '-c', code], cwd=directory,
+                              env=writable)
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', code],
+                              cwd=directory, env=env)
+        times.append(time.time() - start)
+
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    work_dir = tempfile.mkdtemp()
+    try:
+        bare = run(work_dir, 'pass')
+        rows = []
+        sources = build(work_dir, 'source')
+        for label, directory, cache in [
+                ('sources', sources, False),
+                ('bytecode cache', sources, True),
+                ('bytecode', build(work_dir, 'bytecode'), False),
+                ('bundle', build(work_dir, 'bundle'), False)]:
+            elapsed = run(directory, cache=cache)
+            rows.append([label, elapsed, elapsed - bare])
+    finally:
+        shutil.rmtree(work_dir)
+
+    report('cold start (median of {0} runs, bare python {1:.6f} s)'.format(
+        REPEAT, bare), ['package', 'script (s)', 'overhead (s)'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+'''
+Measure construction time, attribute access time and size of elements.
+
+Usage::
+
+    python -m benchmarks.bench_elements
+'''
+import sys
+from workflows.script_filter import Item, Title, SubTitle, Icon
+from ._common import best_of, peak_memory, report
+
+
+N = 10000
+
+
+def build_items():
+    items = []
+    for i in range(N):
+        item = Item(uid='uid', arg='arg', valid=True, autocomplete='title')
+        item.append(Title('title'))
+        item.append(SubTitle('subtitle'))
+        item.append(Icon('icon.png', type='fileicon'))
+        items.append(item)
+
+    return items
+
+
+def object_size(obj):
+    '''Return size of **obj** including its __dict__.'''
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+
+    return size
+
+
+def main():
+    item = build_items()[0]
+
+    def access():
+        for i in range(N):
+            item.uid, item.arg, item.valid, item.autocomplete, item.type
+
+    report('elements ({0} items)'.format(N),
+           ['construct (s)', 'access (s)', 'peak (KiB)',
+            'Item (byte)', 'Title (byte)'],
+           [[best_of(build_items), best_of(access), peak_memory(build_items),
+             object_size(item), object_size(item.sub_elements[0])]])
+
+
+if __name__ == '__main__':
+    main()
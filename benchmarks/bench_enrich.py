@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+'''
+Measure enrichment of appended items by append_subtitle and append_text,
+addressed by index and by uid.
+
+Usage::
+
+    python -m benchmarks.bench_enrich
+'''
+from workflows.script_filter import ScriptFilterManager
+from ._common import best_of, report
+
+N = 10000
+
+
+def items():
+    manager = ScriptFilterManager()
+    manager.extend_items(('title {0}'.format(i), 'icon.png',
+                          'subtitle {0}'.format(i), 'uid{0}'.format(i))
+                         for i in range(N))
+    return manager
+
+
+def enrich(keys):
+    def func():
+        manager = items()
+        for k in keys:
+            manager.append_subtitle(k, None, alt='Copy path',
+                                    cmd='Reveal in Finder')
+            manager.append_text(k, copy='copy', largetype='large')
+        return manager
+
+    return func
+
+
+def main():
+    by_index = enrich(range(N))
+    by_uid = enrich(['uid{0}'.format(i) for i in range(N)])
+    assert by_index().tostring() == by_uid().tostring()
+
+    report('enrichment of {0} items'.format(N),
+           ['append only (s)', 'by index (s)', 'by uid (s)'],
+           [[best_of(items), best_of(by_index), best_of(by_uid)]])
+
+
+if __name__ == '__main__':
+    main()
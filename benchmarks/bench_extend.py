@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+'''
+Compare append_item() loop with extend_items().
+
+Usage::
+
+    python -m benchmarks.bench_extend
+'''
+from workflows.script_filter import ScriptFilterManager
+from ._common import SIZES, best_of, report
+
+
+def records(n):
+    for i in range(n):
+        yield ('title {0}'.format(i), 'icon.png', '~/file_{0}'.format(i),
+               'uid{0}'.format(i), '~/file_{0}'.format(i), True)
+
+
+def by_append_item(n):
+    manager = ScriptFilterManager()
+    for r in records(n):
+        manager.append_item(*r)
+
+
+def by_extend_items(n):
+    ScriptFilterManager().extend_items(records(n))
+
+
+def by_extend_items_dict(n):
+    keys = ('title', 'icon_path_or_name', 'subtitle', 'uid', 'arg', 'valid')
+    ScriptFilterManager().extend_items(
+        dict(zip(keys, r)) for r in records(n)
+    )
+
+
+def main():
+    rows = []
+    for n in SIZES:
+        rows.append([n,
+                     best_of(lambda: by_append_item(n)),
+                     best_of(lambda: by_extend_items(n)),
+                     best_of(lambda: by_extend_items_dict(n))])
+
+    report('append_item vs extend_items',
+           ['items', 'append (s)', 'extend tuple', 'extend dict'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+'''
+Per-keystroke latency of SearchIndex compared with scanning all
+candidates by workflows.matching.
+
+Usage::
+
+    python -m benchmarks.bench_index
+'''
+import os
+import shutil
+import random
+import timeit
+import tempfile
+from workflows.index import SearchIndex
+from workflows.matching import search
+from ._common import SIZES, best_of, report
+from .bench_matching import WORDS
+
+
+# number of records which match the selective query.
+NEEDLES = 100
+
+
+def candidates(n):
+    r = random.Random(1)
+    titles = ['/'.join(r.choice(WORDS) for _ in range(r.randint(2, 5))) +
+              '_{0}.py'.format(i) for i in range(n - NEEDLES)]
+    for i in range(NEEDLES):
+        titles.insert(r.randint(0, len(titles)), 'zebra/zoo_{0}.txt'.format(i))
+
+    return titles
+
+
+def fresh(index, query):
+    '''Search without state of previous query.'''
+    try:
+        os.remove(index._state_path)
+    except OSError:
+        pass
+
+    return index.search(query)
+
+
+def typing(index, queries, repeat=3):
+    '''Return the best seconds of each keystroke.'''
+    best = [None] * len(queries)
+    for _ in range(repeat):
+        fresh(index, '')
+        for i, q in enumerate(queries):
+            start = timeit.default_timer()
+            index.search(q)
+            elapsed = timeit.default_timer() - start
+            if best[i] is None or elapsed < best[i]:
+                best[i] = elapsed
+
+    return best
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        rows = []
+        for n in SIZES:
+            titles = candidates(n)
+            path = os.path.join(directory, 'index')
+            build = best_of(lambda: SearchIndex.build(
+                path, ((t, 'icon.png') for t in titles)), repeat=1)
+            index = SearchIndex(path)
+
+            rows.append([n, build,
+                         best_of(lambda: search('zbr', titles), repeat=5),
+                         best_of(lambda: fresh(index, 'zbr'), repeat=5)])
+
+        report('selective query "zbr" ({0} matches)'.format(NEEDLES),
+               ['records', 'build (s)', 'scan (s)', 'index (s)'],
+               rows)
+
+        queries = ['p', 'pr', 'pro', 'proj', 'proje', 'projec']
+        keystrokes = typing(index, queries)
+        rows = []
+        for q, elapsed in zip(queries, keystrokes):
+            rows.append([q, len(index.search(q, limit=None)),
+                         best_of(lambda: search(q, titles), repeat=3),
+                         best_of(lambda: fresh(index, q), repeat=3),
+                         elapsed])
+
+        report('typing over {0} records'.format(SIZES[-1]),
+               ['query', 'matched', 'scan (s)', 'index fresh',
+                'index refined'],
+               rows)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
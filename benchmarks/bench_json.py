@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+'''
+Compare tostring() (xml) with tojson() for the same items.
+
+Usage::
+
+    python -m benchmarks.bench_json
+'''
+from workflows.script_filter import ScriptFilterManager
+from ._common import SIZES, fill_manager, best_of, report
+
+
+def main():
+    rows = []
+    for n in SIZES:
+        manager = fill_manager(ScriptFilterManager(), n)
+        rows.append([n, best_of(manager.tostring), best_of(manager.tojson)])
+
+    report('xml vs json', ['items', 'tostring (s)', 'tojson (s)'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+'''
+Per-keystroke latency of fuzzy matching over 100k candidates, compared
+with a substring filter in a Python loop.
+
+Usage::
+
+    python -m benchmarks.bench_matching
+'''
+import random
+from workflows.matching import search
+from ._common import best_of, report
+
+
+# per-keystroke latency budget (seconds).
+BUDGET = 0.3
+
+WORDS = ['python', 'project', 'workflow', 'alfred', 'readme', 'source',
+         'tests', 'docs', 'Build', 'config', 'MainWindow', 'utils']
+
+QUERIES = ['p', 'pr', 'proj', 'projwf', 'pwf', 'mw', 'xyz']
+
+
+def candidates(n):
+    r = random.Random(1)
+    return ['/'.join(r.choice(WORDS) for _ in range(r.randint(2, 5))) +
+            '_{0}.py'.format(i) for i in range(n)]
+
+
+def by_substring(query, titles):
+    query = query.lower()
+    return sorted(t for t in titles if query in t.lower())[:20]
+
+
+def main():
+    titles = candidates(100000)
+
+    rows = []
+    for q in QUERIES:
+        elapsed = best_of(lambda: search(q, titles), repeat=5)
+        rows.append([q,
+                     len(search(q, titles, limit=None)),
+                     best_of(lambda: by_substring(q, titles), repeat=5),
+                     elapsed,
+                     'yes' if elapsed <= BUDGET else 'NO'])
+
+    report('fuzzy matching of 100000 candidates',
+           ['query', 'matched', 'substring (s)', 'fuzzy (s)', 'in budget'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
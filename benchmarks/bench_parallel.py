@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+'''
+Scaling of parallel_search with number of processes, and the crossover
+point where it overtakes serial search. Speedup is bounded by number of
+CPUs, which is printed in the title.
+
+Usage::
+
+    python -m benchmarks.bench_parallel
+'''
+import multiprocessing
+from workflows.matching import search, parallel_search
+from ._common import best_of, report
+from .bench_matching import candidates
+
+
+PROCESSES = [2, 4]
+
+CORPUS_SIZES = [10000, 50000, 100000, 300000]
+
+QUERY = 'proj'
+
+
+def crossover(rows, column):
+    '''Return the first corpus size where **column** beats serial.'''
+    for row in rows:
+        if row[column] < row[1]:
+            return row[0]
+
+    return 'not reached'
+
+
+def main():
+    titles = candidates(max(CORPUS_SIZES))
+
+    pools = dict((p, multiprocessing.Pool(p)) for p in PROCESSES)
+    try:
+        rows = []
+        for n in CORPUS_SIZES:
+            part = titles[:n]
+            row = [n, best_of(lambda: search(QUERY, part))]
+            for p in PROCESSES:
+                row.append(best_of(lambda: parallel_search(
+                    QUERY, part, processes=p, threshold=0)))
+            for p in PROCESSES:
+                row.append(best_of(lambda: parallel_search(
+                    QUERY, part, processes=p, threshold=0, pool=pools[p])))
+            rows.append(row)
+    finally:
+        for pool in pools.values():
+            pool.terminate()
+
+    header = (['candidates', 'serial (s)'] +
+              ['{0} new pool'.format(p) for p in PROCESSES] +
+              ['{0} reused pool'.format(p) for p in PROCESSES])
+    report('"{0}" on {1} CPUs'.format(QUERY, multiprocessing.cpu_count()),
+           header, rows)
+
+    for column, name in enumerate(header[2:], 2):
+        print('crossover of {0}: {1}'.format(name, crossover(rows, column)))
+
+
+if __name__ == '__main__':
+    main()
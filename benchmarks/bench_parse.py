@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+'''
+Compare loading cached script filter xml by ElementTree.parse and
+rebuilding items by hand, with iterparse_items which yields items one at
+a time. Both filter the items and keep a few matched ones.
+
+Usage::
+
+    python -m benchmarks.bench_parse
+'''
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as etree
+from workflows.script_filter import (
+    ScriptFilterManager, Item, Title, SubTitle, Icon, iterparse_items)
+from ._common import SIZES, fill_manager, best_of, peak_memory, report
+
+
+def matched(title):
+    return title.endswith('999')
+
+
+def by_parse(path):
+    manager = ScriptFilterManager()
+    for e in etree.parse(path).getroot():
+        title = e.find('title').text
+        if not matched(title):
+            continue
+
+        attrib = dict(e.attrib)
+        valid = attrib.pop('valid', None)
+        item = Item(uid_strategy=None, **attrib)
+        item.valid = None if valid is None else valid == 'YES'
+        item.append(Title(title))
+        for st in e.findall('subtitle'):
+            item.append(SubTitle(st.text, mod=st.get('mod')))
+        icon = e.find('icon')
+        item.append(Icon(icon.text, type=icon.get('type')))
+        manager._items.append(item)
+
+    return manager.tostring()
+
+
+def by_iterparse(path):
+    manager = ScriptFilterManager()
+    manager.extend_elements(i for i in iterparse_items(path)
+                            if matched(i.find(Title).text))
+    return manager.tostring()
+
+
+def main():
+    work_dir = tempfile.mkdtemp()
+    rows = []
+    try:
+        paths = []
+        for n in SIZES:
+            path = os.path.join(work_dir, '{0}.xml'.format(n))
+            with open(path, 'wb') as f:
+                fill_manager(ScriptFilterManager(), n).write(f)
+            paths.append(path)
+
+        # peak memory is measured before the parent process parses, whose
+        # peak is inherited by forked processes.
+        peaks = [(peak_memory(lambda: by_parse(path)),
+                  peak_memory(lambda: by_iterparse(path)))
+                 for path in paths]
+
+        for n, path, peak in zip(SIZES, paths, peaks):
+            assert by_parse(path) == by_iterparse(path)
+            rows.append([n, os.path.getsize(path) // 1024,
+                         best_of(lambda: by_parse(path)),
+                         best_of(lambda: by_iterparse(path))] + list(peak))
+    finally:
+        shutil.rmtree(work_dir)
+
+    report('parse cached xml and keep items of title "*999"',
+           ['items', 'xml (KiB)', 'parse (s)', 'iterparse (s)',
+            'peak (KiB)', 'peak iter'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+'''
+Latency of providers run one after another, compared with gather().
+
+Usage::
+
+    python -m benchmarks.bench_providers
+'''
+import threading
+from workflows.providers import gather
+from workflows.script_filter import ScriptFilterManager
+from ._common import best_of, report
+
+
+# seconds of fake providers. (ex. subprocess, local socket, file)
+DELAYS = [0.02, 0.05, 0.08, 0.12]
+
+TIMEOUTS = [0.1, 0.3]
+
+
+def fake(delay):
+    def provider(cancel):
+        cancel.wait(delay)
+        return [('result {0}'.format(i), 'icon.png') for i in range(10)]
+
+    return provider
+
+
+def sequential():
+    manager = ScriptFilterManager()
+    for p in map(fake, DELAYS):
+        # event which is never set.
+        manager.extend_items(p(threading.Event()))
+
+
+def main():
+    rows = [['sequential', len(DELAYS),
+             best_of(sequential, repeat=5)]]
+
+    for timeout in TIMEOUTS:
+        finished = []
+
+        def concurrent():
+            late = gather(ScriptFilterManager(), list(map(fake, DELAYS)),
+                          timeout)
+            finished.append(len(DELAYS) - len(late))
+
+        elapsed = best_of(concurrent, repeat=5)
+        rows.append(['gather {0}s'.format(timeout), min(finished), elapsed])
+
+    report('providers of {0} seconds'.format(DELAYS),
+           ['mode', 'finished', 'latency (s)'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+'''
+Compare appending all scored items and sorting them with append_ranked,
+which keeps only top max_items records in a heap.
+
+Usage::
+
+    python -m benchmarks.bench_ranked
+'''
+import random
+from workflows.script_filter import ScriptFilterManager
+from ._common import SIZES, best_of, peak_memory, report
+
+MAX_ITEMS = 50
+
+
+def scored(n):
+    r = random.Random(n)
+    return [(r.random(), ('title {0}'.format(i), 'icon.png',
+                          'subtitle {0}'.format(i)))
+            for i in range(n)]
+
+
+def by_sorting(records):
+    manager = ScriptFilterManager()
+    manager.extend_items(r for _, r in sorted(records, key=lambda e: -e[0]))
+    return manager.tojson()
+
+
+def by_ranked(records):
+    manager = ScriptFilterManager(
+        max_items=MAX_ITEMS,
+        more=lambda n: ('{0} more...'.format(n), 'icon.png'))
+    manager.extend_ranked(records)
+    return manager.tojson()
+
+
+def main():
+    rows = []
+    for n in SIZES:
+        records = scored(n)
+        rows.append([n,
+                     best_of(lambda: by_sorting(records)),
+                     best_of(lambda: by_ranked(records)),
+                     peak_memory(lambda: by_sorting(records)),
+                     peak_memory(lambda: by_ranked(records))])
+
+    report('all items vs top {0} by append_ranked (tojson)'.format(
+        MAX_ITEMS),
+        ['records', 'all (s)', 'ranked (s)', 'peak (KiB)', 'peak ranked'],
+        rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+'''
+Compare ElementTree serialization with direct serialization.
+
+Usage::
+
+    python -m benchmarks.bench_serialize
+'''
+import xml.etree.ElementTree as etree
+from workflows.script_filter import ScriptFilterManager
+from ._common import SIZES, fill_manager, best_of, peak_memory, report
+
+
+def main():
+    rows = []
+    for n in SIZES:
+        items = fill_manager(ScriptFilterManager(), n)._items
+
+        def by_etree():
+            etree.tostring(items.build())
+
+        def by_direct():
+            items.tostring()
+
+        assert etree.tostring(items.build()) == items.tostring()
+
+        rows.append([n,
+                     best_of(by_etree), best_of(by_direct),
+                     peak_memory(by_etree), peak_memory(by_direct)])
+
+    report('tostring: etree vs direct',
+           ['items', 'etree (s)', 'direct (s)',
+            'etree (KiB)', 'direct (KiB)'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+'''
+Compare reading whole output of a command before appending items with
+extend_command, which appends items as lines arrive and kills the
+command at the limit.
+
+Usage::
+
+    python -m benchmarks.bench_sources
+'''
+import time
+import subprocess
+from workflows.script_filter import ScriptFilterManager
+from workflows.sources import extend_command
+from ._common import SIZES, best_of, peak_memory, report
+
+LIMIT = 20
+
+
+class FirstWrite(object):
+    '''Output which records time of the first item.'''
+    def __init__(self):
+        self.first = None
+
+    def write(self, data):
+        if self.first is None and data.startswith(('<item>', '<item ')):
+            self.first = time.time()
+
+
+def record(line):
+    return (line, 'icon.png', None, None, line)
+
+
+def by_buffering(n, fp=None, limit=LIMIT):
+    manager = ScriptFilterManager(uid_strategy=None)
+    p = subprocess.Popen(['seq', str(n)], stdout=subprocess.PIPE)
+    stdout, _ = p.communicate()
+    lines = stdout.splitlines()
+    with manager.streaming(fp or FirstWrite()):
+        manager.extend_items(record(l) for l in lines[:limit])
+
+
+def by_streaming(n, fp=None, limit=LIMIT):
+    manager = ScriptFilterManager(uid_strategy=None)
+    with manager.streaming(fp or FirstWrite()):
+        extend_command(manager, ['seq', str(n)], record, limit=limit)
+
+
+def first_result(func, n):
+    fp = FirstWrite()
+    start = time.time()
+    func(n, fp, None)
+    return fp.first - start
+
+
+def main():
+    rows = []
+    for n in SIZES + [SIZES[-1] * 10]:
+        rows.append([n,
+                     best_of(lambda: by_buffering(n)),
+                     best_of(lambda: by_streaming(n)),
+                     first_result(by_buffering, n),
+                     first_result(by_streaming, n),
+                     peak_memory(lambda: by_buffering(n)),
+                     peak_memory(lambda: by_streaming(n))])
+
+    report('"seq N" to top {0} items, and time to first item of all'.format(
+        LIMIT),
+        ['lines', 'buffer (s)', 'stream (s)', 'first buf (s)',
+         'first stream', 'peak (KiB)', 'peak stream'],
+        rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+'''
+Measure startup time of a script filter process, and list modules
+loaded by it.
+
+Usage::
+
+    python -m benchmarks.bench_startup
+'''
+import os
+import sys
+import time
+import subprocess
+from ._common import report
+
+
+SCRIPT = '''
+import workflows.script_filter as sf
+manager = sf.ScriptFilterManager()
+manager.append_item('title', 'icon.png', uid='uid')
+manager.tostring()
+'''
+
+REPEAT = 20
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code, repeat=REPEAT):
+    '''
+    Return median wall-clock seconds of running **code** in a new process.
+
+    Args:
+        code (str): python code.
+        repeat (int, optional): number of runs.
+
+    Returns:
+        float: seconds.
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', code], cwd=top_dir)
+        times.append(time.time() - start)
+
+    return sorted(times)[len(times) // 2]
+
+
+def loaded_modules(code):
+    '''Return modules which are loaded by **code** newly.'''
+    out = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys\nbefore = set(sys.modules)\n' + code +
+        '\nprint(" ".join(sorted(m for m in set(sys.modules) - before '
+        'if sys.modules[m])))'
+    ], cwd=top_dir)
+
+    return out.decode('ascii').split()
+
+
+def main():
+    bare = run('pass')
+    script = run(SCRIPT)
+
+    report('startup (median of {0} runs)'.format(REPEAT),
+           ['bare (s)', 'script (s)', 'overhead (s)'],
+           [[bare, script, script - bare]])
+
+    print('loaded modules: {0}'.format(' '.join(loaded_modules(SCRIPT))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+'''
+Compare per-keystroke cost of fixed menu items built by append_item with
+items spliced from serialized fragments by append_static.
+
+Usage::
+
+    python -m benchmarks.bench_static
+'''
+import shutil
+import tempfile
+import workflows.script_filter as sf
+from workflows.script_filter import ScriptFilterManager
+from ._common import SIZES, best_of, report
+
+
+def menu(n):
+    def fill(manager):
+        for i in range(n):
+            manager.append_item(u'Menu {0} & <more>'.format(i), 'icon.png',
+                                subtitle='Open menu {0}'.format(i),
+                                arg='menu:{0}'.format(i), valid=True,
+                                uid='menu-{0}'.format(i))
+            manager.append_subtitle(-1, None, alt='Copy',
+                                    cmd='Reveal in Finder')
+
+    return fill
+
+
+def by_append_item(fill):
+    manager = ScriptFilterManager(uid_strategy=None)
+    fill(manager)
+    return manager.tostring()
+
+
+def by_static(fill, name, directory):
+    manager = ScriptFilterManager(uid_strategy=None)
+    manager.append_static(name, fill, directory)
+    return manager.tostring()
+
+
+def cold(fill, name, directory):
+    # new process: the fragments are read from the disk cache.
+    sf._static_items.clear()
+    return by_static(fill, name, directory)
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    rows = []
+    try:
+        for n in SIZES:
+            fill = menu(n)
+            name = 'menu-{0}'.format(n)
+            assert by_append_item(fill) == cold(fill, name, directory)
+
+            rows.append([n,
+                         best_of(lambda: by_append_item(fill)),
+                         best_of(lambda: cold(fill, name, directory)),
+                         best_of(lambda: by_static(fill, name, directory))])
+    finally:
+        sf._static_items.clear()
+        shutil.rmtree(directory)
+
+    report('append_item vs append_static (build + tostring)',
+           ['items', 'append_item (s)', 'static, disk', 'static, memory'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+'''
+Compare time to first byte and peak memory of tostring() and streaming().
+
+Usage::
+
+    python -m benchmarks.bench_streaming
+'''
+import os
+import time
+from workflows.script_filter import ScriptFilterManager
+from ._common import SIZES, fill_manager, peak_memory, report
+
+
+class FirstByteFile(object):
+    '''Discard written data, but remember when the first chunk arrived.'''
+    def __init__(self):
+        self.first = None
+        self._null = open(os.devnull, 'w')
+
+    def write(self, data):
+        if self.first is None:
+            self.first = time.time()
+        self._null.write(data)
+
+    def flush(self):
+        self._null.flush()
+
+
+def by_tostring(n):
+    fp = FirstByteFile()
+    start = time.time()
+    fill_manager(ScriptFilterManager(), n).write(fp)
+    return fp.first - start
+
+
+def by_streaming(n):
+    fp = FirstByteFile()
+    start = time.time()
+    manager = ScriptFilterManager()
+    with manager.streaming(fp):
+        fill_manager(manager, n)
+    return fp.first - start
+
+
+def main():
+    rows = []
+    for n in SIZES:
+        rows.append([n, by_tostring(n), by_streaming(n),
+                     peak_memory(lambda: by_tostring(n)),
+                     peak_memory(lambda: by_streaming(n))])
+
+    report('first byte: tostring vs streaming',
+           ['items', 'tostring (s)', 'streaming (s)',
+            'tostring (KiB)', 'streaming (KiB)'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
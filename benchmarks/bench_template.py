@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+'''
+Compare homogeneous items appended by append_item and append_subtitle
+with items stamped out from ItemTemplate.
+
+Usage::
+
+    python -m benchmarks.bench_template
+'''
+from workflows.script_filter import ScriptFilterManager, ItemTemplate
+from ._common import SIZES, best_of, peak_memory, report
+
+
+def by_append_item(n):
+    manager = ScriptFilterManager(uid_strategy=None)
+    for i in range(n):
+        manager.append_item('title {0}'.format(i), 'icon.png',
+                            subtitle='subtitle {0}'.format(i),
+                            arg='~/file_{0}'.format(i), valid=True,
+                            icon_type='fileicon', is_file=True)
+        manager.append_subtitle(i, None, alt='Copy path',
+                                cmd='Reveal in Finder')
+
+    return manager
+
+
+def by_template(n):
+    manager = ScriptFilterManager(uid_strategy=None)
+    template = ItemTemplate('icon.png', icon_type='fileicon', valid=True,
+                            is_file=True, alt='Copy path',
+                            cmd='Reveal in Finder')
+    manager.extend_templated(template, (
+        ('title {0}'.format(i), 'subtitle {0}'.format(i), None,
+         '~/file_{0}'.format(i)) for i in range(n)))
+
+    return manager
+
+
+def main():
+    rows = []
+    for n in SIZES:
+        plain = by_append_item(n)
+        templated = by_template(n)
+        assert plain.tostring() == templated.tostring()
+
+        rows.append([n,
+                     best_of(lambda: by_append_item(n)),
+                     best_of(lambda: by_template(n)),
+                     best_of(plain.tostring),
+                     best_of(templated.tostring),
+                     peak_memory(lambda: by_append_item(n)),
+                     peak_memory(lambda: by_template(n))])
+
+    report('append_item vs ItemTemplate',
+           ['items', 'build (s)', 'build tmpl', 'tostring (s)',
+            'tostring tmpl', 'peak (KiB)', 'peak tmpl'],
+           rows)
+
+
+if __name__ == '__main__':
+    main()
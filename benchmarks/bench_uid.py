@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+'''
+Compare uid strategies of ScriptFilterManager.
+
+Usage::
+
+    python -m benchmarks.bench_uid
+'''
+from workflows.script_filter import (
+    ScriptFilterManager, uuid_uid, hash_uid, CounterUid
+)
+from ._common import best_of, report
+
+
+N = 10000
+
+
+def run(strategy):
+    manager = ScriptFilterManager(uid_strategy=strategy)
+    for i in range(N):
+        manager.append_item('title {0}'.format(i), 'icon.png',
+                            arg='arg {0}'.format(i))
+    manager.tostring()
+
+
+def main():
+    rows = []
+    for name, make_strategy in [('uuid_uid', lambda: uuid_uid),
+                                ('hash_uid', lambda: hash_uid),
+                                ('CounterUid', CounterUid),
+                                ('None', lambda: None)]:
+        rows.append([name, best_of(lambda: run(make_strategy()))])
+
+    report('uid strategies ({0} items, append + tostring)'.format(N),
+           ['strategy', 'time (s)'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark suite of the script filter pipeline, with JSON baselines.
+
+Each case is measured for each number of items, and results are stored
+as JSON, so that an optimization (ex. in xml_tree.py) can be compared
+with a baseline. compare exits with status 1 if a case is slower than
+the baseline by more than the threshold.
+
+Usage::
+
+    # measure and print results, and save them as a baseline.
+    python -m benchmarks.suite run -o benchmarks/baselines/mine.json
+
+    # measure again and compare with the baseline.
+    python -m benchmarks.suite compare benchmarks/baselines/mine.json
+
+    # compare two saved results.
+    python -m benchmarks.suite compare old.json new.json
+'''
+import os
+import sys
+import json
+import platform
+import argparse
+import subprocess
+from workflows.script_filter import ScriptFilterManager
+from ._common import fill_manager, best_of, report
+
+
+SIZES = [10, 100, 1000, 10000, 100000]
+
+# slower than baseline by this ratio is a regression. Timing of a busy
+# machine varies by tens of percent.
+THRESHOLD = 1.5
+
+# number of measurements. The best one is used.
+REPEAT = 5
+
+# times to measure a regression again before reporting it, because noise
+# of other processes lasts longer than a measurement.
+RETRY = 2
+
+# total items of each measurement of small sizes, so that timer
+# resolution doesn't matter.
+MIN_ITEMS = 10000
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def construct(n):
+    return lambda: fill_manager(ScriptFilterManager(), n)
+
+
+def build(n):
+    items = fill_manager(ScriptFilterManager(), n)._items
+    return items.build
+
+
+def tostring(n):
+    return fill_manager(ScriptFilterManager(), n).tostring
+
+
+def tojson(n):
+    return fill_manager(ScriptFilterManager(), n).tojson
+
+
+def extend(n):
+    def func():
+        manager = fill_manager(ScriptFilterManager(), n)
+        for i in range(n):
+            manager.append_subtitle(i, None, alt='Copy path',
+                                    cmd='Reveal in Finder')
+            manager.append_text(i, copy='copy {0}'.format(i),
+                                largetype='large {0}'.format(i))
+
+    return func
+
+
+STARTUP_SCRIPT = '''
+import sys
+from workflows.script_filter import ScriptFilterManager
+from benchmarks._common import fill_manager
+sys.stdout.write(fill_manager(ScriptFilterManager(), {0}).tostring())
+'''
+
+
+def startup(n):
+    code = STARTUP_SCRIPT.format(n)
+
+    def func():
+        with open(os.devnull, 'wb') as null:
+            subprocess.check_call([sys.executable, '-c', code],
+                                  cwd=top_dir, stdout=null)
+
+    return func
+
+
+# name, function which takes number of items and returns a function
+# to measure, and whether it runs in a new process.
+CASES = [
+    ('construct', construct, False),
+    ('build', build, False),
+    ('tostring', tostring, False),
+    ('tojson', tojson, False),
+    ('extend', extend, False),
+    ('startup', startup, True),
+]
+
+
+def measure(cases=None, sizes=None):
+    '''
+    Run benchmark cases.
+
+    Args:
+        cases (list of str, optional): names of cases. Default is all.
+        sizes (list of int, optional): numbers of items. Default is SIZES.
+
+    Returns:
+        dict: results. "results" maps "case/items" to seconds.
+    '''
+    sizes = SIZES if sizes is None else sizes
+    results = {}
+
+    for name, setup, process in CASES:
+        if cases is not None and name not in cases:
+            continue
+
+        for n in sizes:
+            number = 1 if process else max(MIN_ITEMS // n, 1)
+            results['{0}/{1}'.format(name, n)] = best_of(
+                setup(n), repeat=REPEAT, number=number)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def _key(key):
+    name, n = key.split('/')
+    names = [c[0] for c in CASES]
+    return (names.index(name) if name in names else len(names), name,
+            int(n))
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    '''
+    Compare results with baseline.
+
+    Args:
+        baseline (dict): results of **measure**.
+        current (dict): results of **measure**.
+        threshold (float, optional): ratio of regression.
+
+    Returns:
+        list of list: rows of (key, baseline, current, ratio, status).
+            status is "slower", "faster" or "".
+    '''
+    before = baseline['results']
+    after = current['results']
+    rows = []
+
+    for key in sorted(set(before) & set(after), key=_key):
+        ratio = after[key] / before[key] if before[key] else float('inf')
+        status = 'slower' if ratio > threshold else \
+            'faster' if ratio < 1.0 / threshold else ''
+        rows.append([key, before[key], after[key], ratio, status])
+
+    return rows
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save(path, results):
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True,
+                  separators=(',', ': '))
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    commands = parser.add_subparsers(dest='command')
+
+    run = commands.add_parser('run', help='measure and print results.')
+    run.add_argument('-o', '--output', help='save results as JSON.')
+
+    cmp_ = commands.add_parser('compare', help='compare with baseline.')
+    cmp_.add_argument('baseline', help='JSON of baseline.')
+    cmp_.add_argument('current', nargs='?',
+                      help='JSON of results. Default is measured now.')
+    cmp_.add_argument('-t', '--threshold', type=float, default=THRESHOLD,
+                      help='ratio of regression. (default: %(default)s)')
+    cmp_.add_argument('-o', '--output',
+                      help='save results measured now as JSON.')
+
+    for p in (run, cmp_):
+        p.add_argument('-c', '--case', action='append', dest='cases',
+                       choices=[c[0] for c in CASES],
+                       help='case to run. (default: all)')
+        p.add_argument('-n', '--items', action='append', type=int,
+                       dest='sizes', help='number of items. '
+                       '(default: {0})'.format(SIZES))
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        baseline = _load(args.baseline)
+        if args.current:
+            current = _load(args.current)
+        else:
+            keys = [k.split('/') for k in baseline['results']]
+            cases = args.cases or sorted(set(k[0] for k in keys))
+            sizes = args.sizes or sorted(set(int(k[1]) for k in keys))
+            current = measure(cases, sizes)
+    else:
+        current = measure(args.cases, args.sizes)
+
+    if args.command == 'run':
+        if args.output:
+            _save(args.output, current)
+        report('suite (python {0})'.format(current['python']),
+               ['case/items', 'seconds'],
+               sorted(current['results'].items(),
+                      key=lambda r: _key(r[0])))
+        return 0
+
+    rows = compare(baseline, current, args.threshold)
+    for _ in range(RETRY if not args.current else 0):
+        slower = [r[0].split('/') for r in rows if r[4] == 'slower']
+        if not slower:
+            break
+
+        results = current['results']
+        for name, n in slower:
+            key = '{0}/{1}'.format(name, n)
+            retried = measure([name], [int(n)])['results'][key]
+            results[key] = min(results[key], retried)
+        rows = compare(baseline, current, args.threshold)
+
+    if args.output:
+        _save(args.output, current)
+
+    report('baseline: python {0}, {1}'.format(baseline['python'],
+                                              baseline['platform']),
+           ['case/items', 'baseline (s)', 'current (s)', 'ratio', ''],
+           rows)
+
+    slower = [r[0] for r in rows if r[4] == 'slower']
+    if slower:
+        print('regressions: {0}'.format(' '.join(slower)))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
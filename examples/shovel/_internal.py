@@ -7,7 +7,8 @@ from contextlib import contextmanager
 def call(args):
     print('call -> {0}'.format(' '.join(args)))
     p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    p.wait()
+    # communicate reads both pipes until the process exits. wait() before
+    # it blocks forever when output fills a pipe.
     stdout, stderr = p.communicate()
 
     if p.returncode == 0:
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import zlib
+import errno
+import struct
+import hashlib
+import tempfile
+import py_compile
+
+
+# zip format. Refer to APPNOTE.TXT of PKWARE.
+_local_header = struct.Struct('<4s5H3L2H')
+_central_header = struct.Struct('<4s6H3L5H2L')
+_end_of_central = struct.Struct('<4s4H2LH')
+
+_version = 20
+_stored = 0
+_deflated = 8
+
+_manifest_name = 'manifest.json'
+
+# bytecode written by running the workflow in place is not packaged.
+_ignored_dirs = ('__pycache__',)
+_ignored_suffixes = ('.pyc', '.pyo')
+
+# it replaces the package with the package in the bundle.
+_bootstrap = '''# -*- coding: utf-8 -*-
+# bootstrap of the package bundled in {0}.
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '{0}'))
+# python 2 clears globals of the module which is not referenced.
+_stub = sys.modules.pop(__name__)
+sys.modules[__name__] = __import__(__name__)
+'''
+
+
+def _dos_time(mtime):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        t = time.localtime(315500400)
+
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def _digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.rename(tmp, path)
+
+
+def _compress(args):
+    '''Deflate the file to a blob. Worker of the process pool.'''
+    path, blob_path = args
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    c = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    blob = c.compress(data) + c.flush()
+
+    # incompressible file is stored as it is.
+    method = _deflated
+    if len(blob) >= len(data):
+        blob, method = data, _stored
+
+    _atomic_write(blob_path, blob)
+
+    return [zlib.crc32(data) & 0xffffffff, len(blob), len(data), method]
+
+
+def collect(sources):
+    '''
+    Return files to package.
+
+    Args:
+        sources (list of tuple): (path, name in archive). If path is a
+            directory, files under it are added recursively, except
+            bytecode (*.pyc, *.pyo and __pycache__).
+
+    Returns:
+        list of tuple: (path, name in archive) in order of name.
+    '''
+    files = []
+    for path, name in sources:
+        if not os.path.isdir(path):
+            files.append((path, name))
+            continue
+
+        for root, dirs, filenames in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in _ignored_dirs)
+            for f in filenames:
+                if f.endswith(_ignored_suffixes):
+                    continue
+                src = os.path.join(root, f)
+                rel = os.path.relpath(src, path).replace(os.sep, '/')
+                files.append((src, name + '/' + rel))
+
+    return sorted(files, key=lambda f: f[1])
+
+
+def _magic():
+    try:
+        from importlib.util import MAGIC_NUMBER
+        return MAGIC_NUMBER
+    except ImportError:
+        import imp
+        return imp.get_magic()
+
+
+def compile_files(files, cache_dir):
+    '''
+    Replace python sources with bytecode compiled by this interpreter,
+    so that the workflow doesn't compile them on each run when it can't
+    write bytecode. Bytecode is cached by hash of the source.
+
+    Bytecode depends on the version of python, so build it with the
+    python which runs the workflow (ex. /usr/bin/python of OS X).
+
+    Args:
+        files (list of tuple): (path, name in archive).
+        cache_dir (str): directory of compiled bytecode.
+
+    Returns:
+        list of tuple: (path, name in archive). ".py" is replaced with
+            ".pyc", which is imported without the source.
+    '''
+    pyc_dir = os.path.join(cache_dir, 'pyc')
+    if not os.path.isdir(pyc_dir):
+        os.makedirs(pyc_dir)
+
+    magic = _magic()
+    compiled = []
+
+    for path, name in files:
+        if not name.endswith('.py'):
+            compiled.append((path, name))
+            continue
+
+        h = hashlib.sha1(magic)
+        h.update(name if isinstance(name, bytes) else name.encode('utf-8'))
+        h.update(_digest(path).encode('ascii'))
+        pyc = os.path.join(pyc_dir, h.hexdigest() + '.pyc')
+
+        if not os.path.exists(pyc):
+            fd, tmp = tempfile.mkstemp(dir=pyc_dir)
+            os.close(fd)
+            # tracebacks show the name in archive.
+            py_compile.compile(path, tmp, name, doraise=True)
+            os.rename(tmp, pyc)
+
+        compiled.append((pyc, name + 'c'))
+
+    return compiled
+
+
+def bundle_files(files, package, cache_dir, bundle_name='bundle.zip'):
+    '''
+    Bundle bytecode of the package into a zip archive imported by
+    zipimport, which reads one file instead of many modules. The package
+    directory keeps only a bootstrap **__init__.py**, the bundle and
+    files which are not python sources.
+
+    Args:
+        files (list of tuple): (path, name in archive).
+        package (str): name of top level package in archive.
+        cache_dir (str): directory of bytecode and the bundle.
+        bundle_name (str, optional): file name of the bundle.
+
+    Returns:
+        list of tuple: (path, name in archive).
+    '''
+    prefix = package + '/'
+    sources = [f for f in files
+               if f[1].startswith(prefix) and f[1].endswith('.py')]
+    others = [f for f in files if f not in sources]
+
+    bundle = os.path.join(cache_dir, bundle_name)
+    Packager(os.path.join(cache_dir, 'bundle'), processes=1).build(
+        bundle, compile_files(sources, cache_dir))
+
+    bootstrap = os.path.join(cache_dir, 'bootstrap.py')
+    data = _bootstrap.format(bundle_name).encode('utf-8')
+    try:
+        with open(bootstrap, 'rb') as f:
+            changed = f.read() != data
+    except IOError:
+        changed = True
+    if changed:
+        _atomic_write(bootstrap, data)
+
+    return sorted(others + [(bootstrap, prefix + '__init__.py'),
+                            (bundle, prefix + bundle_name)],
+                  key=lambda f: f[1])
+
+
+class Packager(object):
+    '''
+    Incremental builder of .alfredworkflow (zip) archive.
+
+    Deflated files are cached as blobs keyed by content hash, with a
+    manifest of them. Only changed files are hashed and compressed again,
+    in a process pool, and the archive is written directly from the blobs
+    without staging copy of the files.
+
+        Examples::
+
+            packager = Packager('_build')
+            packager.build('date.alfredworkflow', collect([
+                ('date', 'date'), ('config/info.plist', 'info.plist')]))
+
+    Args:
+        cache_dir (str): directory of blobs and manifest.
+        processes (int, optional): number of processes which compress
+            files. Default is number of CPUs.
+    '''
+    def __init__(self, cache_dir, processes=None):
+        self._cache_dir = cache_dir
+        self._blob_dir = os.path.join(cache_dir, 'blobs')
+        self._manifest_path = os.path.join(cache_dir, _manifest_name)
+        self._processes = processes
+
+    def _blob_path(self, digest):
+        return os.path.join(self._blob_dir, digest)
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path) as f:
+                manifest = json.load(f)
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise
+            manifest = None
+        except ValueError:
+            # broken manifest is rebuilt.
+            manifest = None
+
+        return manifest or {'files': {}, 'blobs': {}}
+
+    def _compress_all(self, jobs):
+        if not jobs:
+            return []
+
+        processes = self._processes
+        if processes is None:
+            import multiprocessing
+            processes = multiprocessing.cpu_count()
+
+        if len(jobs) < 2 or processes < 2:
+            return [_compress(j) for j in jobs]
+
+        import multiprocessing
+        pool = multiprocessing.Pool(min(processes, len(jobs)))
+        try:
+            return pool.map(_compress, jobs, chunksize=1)
+        finally:
+            pool.terminate()
+
+    def build(self, archive, files):
+        '''
+        Write the archive of the files.
+
+        Args:
+            archive (str): path of the archive.
+            files (list of tuple): (path, name in archive).
+
+        Returns:
+            int: number of compressed files. Others were reused.
+
+        Raises:
+            ValueError: a name appears twice in the archive, or the archive
+                exceeds limits of zip format without zip64.
+        '''
+        names = set()
+        for _, name in files:
+            if name in names:
+                raise ValueError('duplicate name in archive: {0}'.
+                                 format(name))
+            names.add(name)
+
+        if not os.path.isdir(self._blob_dir):
+            os.makedirs(self._blob_dir)
+
+        old = self._load_manifest()
+        manifest = {'files': {}, 'blobs': {}}
+        entries = []
+        jobs = []
+
+        for path, name in files:
+            st = os.stat(path)
+            signature = [st.st_size, st.st_mtime]
+
+            # unchanged size and mtime means unchanged content.
+            record = old['files'].get(name)
+            if record and record[:2] == signature:
+                digest = record[2]
+            else:
+                digest = _digest(path)
+            manifest['files'][name] = signature + [digest]
+
+            if digest not in manifest['blobs']:
+                blob = old['blobs'].get(digest)
+                if blob is None or \
+                        not os.path.exists(self._blob_path(digest)):
+                    jobs.append((path, digest))
+                manifest['blobs'][digest] = blob
+            entries.append((name, digest, st))
+
+        results = self._compress_all(
+            [(path, self._blob_path(digest)) for path, digest in jobs])
+        for (_, digest), info in zip(jobs, results):
+            manifest['blobs'][digest] = info
+
+        self._write(archive, entries, manifest['blobs'])
+
+        # blobs of removed or changed files are collected.
+        for digest in set(old['blobs']) - set(manifest['blobs']):
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+        _atomic_write(self._manifest_path,
+                      json.dumps(manifest, sort_keys=True).encode('utf-8'))
+
+        return len(jobs)
+
+    def _write(self, archive, entries, blobs):
+        if len(entries) > 0xffff:
+            raise ValueError('too many files for zip.')
+
+        directory = os.path.dirname(os.path.abspath(archive))
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        central = []
+
+        with os.fdopen(fd, 'wb') as f:
+            offset = 0
+            for name, digest, st in entries:
+                crc, csize, usize, method = blobs[digest]
+                if isinstance(name, bytes):
+                    name = name.decode('utf-8')
+                encoded = name.encode('utf-8')
+                # general purpose flag: name is UTF-8.
+                flags = 0x800 if len(encoded) != len(name) else 0
+                name = encoded
+                dos_time, dos_date = _dos_time(st.st_mtime)
+
+                f.write(_local_header.pack(
+                    b'PK\x03\x04', _version, flags, method, dos_time,
+                    dos_date, crc, csize, usize, len(name), 0))
+                f.write(name)
+                with open(self._blob_path(digest), 'rb') as blob:
+                    f.write(blob.read())
+
+                central.append(_central_header.pack(
+                    b'PK\x01\x02', (3 << 8) | _version, _version, flags,
+                    method, dos_time, dos_date, crc, csize, usize,
+                    len(name), 0, 0, 0, 0,
+                    (st.st_mode & 0xffff) << 16, offset) + name)
+                offset += _local_header.size + len(name) + csize
+
+            data = b''.join(central)
+            if offset + len(data) > 0xffffffff:
+                raise ValueError('archive is too large for zip.')
+
+            f.write(data)
+            f.write(_end_of_central.pack(
+                b'PK\x05\x06', 0, 0, len(central), len(central),
+                len(data), offset, 0))
+
+        os.chmod(tmp, 0o644)
+        os.rename(tmp, archive)
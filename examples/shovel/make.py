@@ -1,8 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
-import shutil
-import zipfile
 from shovel import task
+from _package import Packager, collect, compile_files, bundle_files
 
 
 app_name = 'date'
@@ -14,26 +13,34 @@ config_dir = os.path.join(top_dir, 'config')
 
 
 @task
-def workflows():
-    if os.path.exists(build_dir):
-        shutil.rmtree(build_dir)
-    os.mkdir(build_dir)
-
-    shutil.copytree(target_dir, os.path.join(build_dir, app_name))
-    shutil.copy(os.path.join(config_dir, 'info.plist'), build_dir)
-    shutil.copy(os.path.join(config_dir, 'icon.png'), build_dir)
-
-    app_file = zipfile.ZipFile(
+def workflows(mode='source'):
+    '''
+    Create the workflow package.
+
+    mode is one of follows. Bytecode is compiled by the python which
+    runs shovel, so it must be the same version as the one of Alfred.
+
+    * source: python sources.
+    * bytecode: bytecode only, which doesn't need compile at startup.
+    * bundle: bytecode in one zip archive imported by zipimport.
+    '''
+    # _build keeps compressed files of the previous build, so only
+    # changed files are compressed again.
+    files = collect([
+        (target_dir, app_name),
+        (os.path.join(config_dir, 'info.plist'), 'info.plist'),
+        (os.path.join(config_dir, 'icon.png'), 'icon.png'),
+    ])
+
+    if mode == 'bytecode':
+        files = compile_files(files, build_dir)
+    elif mode == 'bundle':
+        files = bundle_files(files, app_name, build_dir)
+    elif mode != 'source':
+        raise ValueError('mode must be source, bytecode or bundle.')
+
+    compressed = Packager(build_dir).build(
         os.path.join(top_dir, '{0}.{1}'.format(app_name, 'alfredworkflow')),
-        'w', zipfile.ZIP_DEFLATED
-    )
-
-    for root, dirs, files in os.walk(build_dir):
-        for f in files:
-            src = os.path.join(root, f)
-            dst = src.split(build_dir)[1]
-            app_file.write(src, dst)
-
-    app_file.close()
+        files)
 
-    shutil.rmtree(build_dir)
+    print('packaged {0} files ({1} compressed)'.format(len(files), compressed))
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import shutil
+import tempfile
+from nose.tools import eq_, ok_, with_setup
+from workflows.cache import ResultCache, MappedResultCache
+
+
+cache_dir = None
+
+
+def setup_cache_dir():
+    global cache_dir
+    cache_dir = tempfile.mkdtemp()
+
+
+def teardown_cache_dir():
+    shutil.rmtree(cache_dir)
+
+
+def set_time(cache, query, atime, mtime):
+    os.utime(cache._path('wf', query), (atime, mtime))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_get_and_set():
+    cache = ResultCache(os.path.join(cache_dir, 'sub'))
+
+    eq_(None, cache.get('wf', 'a'))
+
+    cache.set('wf', 'a', b'<items />')
+    eq_(b'<items />', cache.get('wf', 'a'))
+    eq_(None, cache.get('other', 'a'))
+
+    cache.set('wf', u'あ', u'<items>あ</items>')
+    eq_(u'<items>あ</items>'.encode('utf-8'), cache.get('wf', u'あ'))
+
+    cache.clear()
+    eq_(None, cache.get('wf', 'a'))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_ttl():
+    cache = ResultCache(cache_dir, ttl=10)
+    cache.set('wf', 'a', b'a')
+
+    now = time.time()
+    set_time(cache, 'a', now, now - 5)
+    eq_(b'a', cache.get('wf', 'a'))
+
+    set_time(cache, 'a', now, now - 11)
+    eq_(None, cache.get('wf', 'a'))
+    ok_(not os.path.exists(cache._path('wf', 'a')))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_evict_lru():
+    cache = ResultCache(cache_dir, max_entries=2)
+    now = time.time()
+
+    cache.set('wf', 'a', b'a')
+    set_time(cache, 'a', now - 3, now)
+    cache.set('wf', 'b', b'b')
+    set_time(cache, 'b', now - 2, now)
+
+    # 'a' is used recently, so 'b' is evicted.
+    cache.get('wf', 'a')
+    cache.set('wf', 'c', b'c')
+
+    eq_(b'a', cache.get('wf', 'a'))
+    eq_(None, cache.get('wf', 'b'))
+    eq_(b'c', cache.get('wf', 'c'))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_evict_by_size():
+    cache = ResultCache(cache_dir, max_bytes=5)
+    now = time.time()
+
+    cache.set('wf', 'a', b'aaa')
+    set_time(cache, 'a', now - 1, now)
+    cache.set('wf', 'b', b'bbb')
+
+    eq_(None, cache.get('wf', 'a'))
+    eq_(b'bbb', cache.get('wf', 'b'))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_fetch():
+    calls = []
+
+    def fill(manager, query):
+        calls.append(query)
+        manager.append_item(query, 'icon.png', uid='uid')
+
+    cache = ResultCache(cache_dir)
+    expect = (b'<items><item uid="uid"><title>a</title>'
+              b'<icon>icon.png</icon></item></items>')
+
+    eq_(expect, cache.fetch('wf', 'a', fill))
+    eq_(expect, cache.fetch('wf', 'a', fill))
+    eq_(['a'], calls)
+
+    eq_({'items': [{'uid': 'uid', 'title': 'b',
+                    'icon': {'path': 'icon.png'}}]},
+        json.loads(cache.fetch('wf', 'b', fill, tojson=True)))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_get_and_set():
+    cache = MappedResultCache(os.path.join(cache_dir, 'sub'))
+
+    eq_(None, cache.get('wf', 'a'))
+
+    cache.set('wf', 'a', b'<items />')
+    eq_(b'<items />', bytes(cache.get('wf', 'a')))
+    eq_(None, cache.get('other', 'a'))
+
+    # overwrite
+    cache.set('wf', 'a', b'<items></items>')
+    eq_(b'<items></items>', bytes(cache.get('wf', 'a')))
+
+    # other process
+    cache.set('wf', u'あ', u'<items>あ</items>')
+    other = MappedResultCache(os.path.join(cache_dir, 'sub'))
+    eq_(b'<items></items>', bytes(other.get('wf', 'a')))
+    eq_(u'<items>あ</items>'.encode('utf-8'), bytes(other.get('wf', u'あ')))
+
+    # the hit can be written to file directly.
+    out = tempfile.TemporaryFile()
+    out.write(other.get('wf', 'a'))
+    out.seek(0)
+    eq_(b'<items></items>', out.read())
+
+    cache.clear()
+    eq_(None, cache.get('wf', 'a'))
+    eq_(None, MappedResultCache(os.path.join(cache_dir, 'sub')).get('wf', 'a'))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_ttl():
+    cache = MappedResultCache(cache_dir, ttl=-1)
+    cache.set('wf', 'a', b'a')
+    eq_(None, cache.get('wf', 'a'))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_grow_index():
+    cache = MappedResultCache(cache_dir, capacity=4)
+    for i in range(20):
+        cache.set('wf', str(i), str(i).encode('ascii'))
+
+    other = MappedResultCache(cache_dir)
+    for i in range(20):
+        eq_(str(i).encode('ascii'), bytes(other.get('wf', str(i))))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_index_of_expired_entries():
+    cache = MappedResultCache(cache_dir, ttl=-1, capacity=16)
+    for i in range(200):
+        cache.set('wf', str(i), str(i).encode('ascii'))
+
+    # expired entries are dropped by compaction instead of growing index.
+    eq_(16, cache._header.unpack_from(cache._index, 0)[2])
+    files = [f for f in os.listdir(cache_dir) if f.endswith('.dat')]
+    ok_(os.path.getsize(os.path.join(cache_dir, files[0])) < 200)
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_compact():
+    # expired records remain until compaction.
+    expired = MappedResultCache(cache_dir, ttl=-1)
+    for i in range(10):
+        expired.set('wf', str(i), b'x' * 100)
+
+    cache = MappedResultCache(cache_dir)
+    cache.set('wf', 'a', b'x' * 100)
+    cache.set('wf', 'b', b'b')
+
+    files = [f for f in os.listdir(cache_dir) if f.endswith('.dat')]
+    size = os.path.getsize(os.path.join(cache_dir, files[0]))
+
+    reader = MappedResultCache(cache_dir)
+    eq_(b'b', bytes(reader.get('wf', 'b')))
+
+    cache.compact()
+    files = [f for f in os.listdir(cache_dir) if f.endswith('.dat')]
+    eq_(1, len(files))
+    ok_(os.path.getsize(os.path.join(cache_dir, files[0])) < size / 5)
+
+    eq_(b'x' * 100, bytes(cache.get('wf', 'a')))
+    eq_(b'b', bytes(MappedResultCache(cache_dir).get('wf', 'b')))
+
+    # reader which maps old files still works.
+    eq_(b'b', bytes(reader.get('wf', 'b')))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_compact_dead_records():
+    cache = MappedResultCache(cache_dir)
+    value = b'x' * 4096
+    for i in range(200):
+        for key in 'abcde':
+            cache.set('wf', key, value)
+
+    # dead records don't exceed live ones, with one more record.
+    files = [f for f in os.listdir(cache_dir) if f.endswith('.dat')]
+    eq_(1, len(files))
+    ok_(os.path.getsize(os.path.join(cache_dir, files[0])) < 4096 * 11 + 256)
+
+    for key in 'abcde':
+        eq_(value, bytes(MappedResultCache(cache_dir).get('wf', key)))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_reader_after_compaction():
+    writer = MappedResultCache(cache_dir, capacity=4)
+    writer.set('wf', 'q0', b'v0')
+
+    reader = MappedResultCache(cache_dir)
+    eq_(b'v0', bytes(reader.get('wf', 'q0')))
+
+    # the writer replaces the index by compaction.
+    for i in range(1, 10):
+        writer.set('wf', 'q{0}'.format(i), 'v{0}'.format(i))
+    writer.set('wf', 'q0', b'new')
+
+    eq_(b'v9', bytes(reader.get('wf', 'q9')))
+    eq_(b'new', bytes(reader.get('wf', 'q0')))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_compact_by_size():
+    cache = MappedResultCache(cache_dir, max_bytes=1000)
+    for i in range(30):
+        cache.set('wf', 'a', b'x' * 100)
+
+    files = [f for f in os.listdir(cache_dir) if f.endswith('.dat')]
+    ok_(os.path.getsize(os.path.join(cache_dir, files[0])) <= 1000)
+    eq_(b'x' * 100, bytes(cache.get('wf', 'a')))
+
+
+@with_setup(setup_cache_dir, teardown_cache_dir)
+def test_mapped_fetch():
+    def fill(manager, query):
+        manager.append_item(query, 'icon.png', uid='uid')
+
+    cache = MappedResultCache(cache_dir)
+    expect = (b'<items><item uid="uid"><title>a</title>'
+              b'<icon>icon.png</icon></item></items>')
+
+    eq_(expect, bytes(cache.fetch('wf', 'a', fill)))
+    eq_(expect, bytes(MappedResultCache(cache_dir).get('wf', 'a')))
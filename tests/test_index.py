@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from nose.tools import eq_, ok_, assert_raises, with_setup
+from workflows.index import SearchIndex
+from workflows.matching import FuzzyMatcher, search
+from workflows.script_filter import ScriptFilterManager
+
+
+index_dir = None
+
+TITLES = ['project/readme.md', 'python/setup.py', 'Project/Main.py',
+          'docs/index.rst', 'alfred/workflow.py', 'prj']
+
+
+def setup_index_dir():
+    global index_dir
+    index_dir = tempfile.mkdtemp()
+
+
+def teardown_index_dir():
+    shutil.rmtree(index_dir)
+
+
+def build(records=None, **kwargs):
+    if records is None:
+        records = [(t, 'icon.png') for t in TITLES]
+
+    return SearchIndex.build(os.path.join(index_dir, 'index'), records,
+                             **kwargs)
+
+
+@with_setup(setup_index_dir, teardown_index_dir)
+def test_search():
+    index = build()
+
+    eq_(len(index), 6)
+    eq_(index.text(2), 'Project/Main.py')
+    eq_(index.record(2), ('Project/Main.py', 'icon.png'))
+
+    for q in ['p', 'pr', 'prj', 'py', 'P', 'xyz', 'ma']:
+        eq_([(s, r[0]) for s, r in index.search(q, limit=None)],
+            search(q, TITLES, limit=None))
+
+    eq_([r[0] for _, r in index.search('py', limit=2)],
+        [r for _, r in search('py', TITLES, limit=2)])
+    eq_(index.search('', limit=2),
+        [(0.0, ('project/readme.md', 'icon.png')),
+         (0.0, ('python/setup.py', 'icon.png'))])
+
+
+@with_setup(setup_index_dir, teardown_index_dir)
+def test_refine():
+    index = build()
+
+    index.search('pr')
+    eq_(sorted(index._refine(FuzzyMatcher('prj'))), [0, 2, 5])
+    eq_(index._refine(FuzzyMatcher('p')), None)
+    eq_(index._refine(FuzzyMatcher('rp')), None)
+
+    # narrowed result is same as the result without state.
+    eq_(index.search('prj', limit=None), search_fresh(index, 'prj'))
+    eq_(sorted(index._refine(FuzzyMatcher('prjm'))), [0, 2, 5])
+
+    # case sensitive query narrows case insensitive result.
+    index.search('pro')
+    eq_(index._refine(FuzzyMatcher('ProM')), [0, 2])
+    eq_(index.search('ProM', limit=None), search_fresh(index, 'ProM'))
+    eq_(index._refine(FuzzyMatcher('prom')), None)
+
+
+def search_fresh(index, query):
+    os.remove(index._state_path)
+    return index.search(query, limit=None)
+
+
+@with_setup(setup_index_dir, teardown_index_dir)
+def test_rebuild():
+    index = build()
+    index.search('pr')
+
+    index = build()
+    index._open()
+    eq_(index._refine(FuzzyMatcher('prj')), None)
+
+
+@with_setup(setup_index_dir, teardown_index_dir)
+def test_records():
+    Record = namedtuple('Record', ['title', 'icon_path_or_name', 'arg'])
+    index = build([{'title': u'ファイル', 'icon_path_or_name': 'icon.png'},
+                   Record(u'file\nname', 'icon.png', 'arg'),
+                   [u'フォルダ', 'icon.png']])
+
+    eq_(index.text(1), u'file name')
+    eq_(index.record(1), {'title': u'file\nname',
+                          'icon_path_or_name': 'icon.png', 'arg': 'arg'})
+    eq_(index.record(2), (u'フォルダ', 'icon.png'))
+    eq_([r['title'] for _, r in index.search(u'ファ')], [u'ファイル'])
+    eq_([r['title'] for _, r in index.search(u'fn')], [u'file\nname'])
+
+
+@with_setup(setup_index_dir, teardown_index_dir)
+def test_extend_matches():
+    manager = ScriptFilterManager()
+
+    eq_(build().extend_matches(manager, 'setup'), 1)
+    ok_('python/setup.py' in manager.tostring())
+
+
+@with_setup(setup_index_dir, teardown_index_dir)
+def test_invalid_file():
+    path = os.path.join(index_dir, 'index')
+    with open(path, 'wb') as f:
+        f.write(b'not an index')
+
+    assert_raises(ValueError, SearchIndex(path).search, 'q')
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+from contextlib import closing
+from nose.tools import eq_, ok_
+from workflows.matching import FuzzyMatcher, search, parallel_search, \
+    extend_matches
+from workflows.script_filter import ScriptFilterManager
+
+
+def test_score():
+    m = FuzzyMatcher('pf')
+
+    eq_(m.score('python-alfred-workflows'), 4.77)
+    eq_(m.score('alfred'), None)
+    eq_(FuzzyMatcher('').score('alfred'), 0.0)
+
+
+def test_score_bonus():
+    m = FuzzyMatcher('aw')
+
+    # initials and word boundary win over letters in the middle.
+    ok_(m.score('alfred workflow') > m.score('flaw'))
+    ok_(FuzzyMatcher('pf').score('tmp/pf') > FuzzyMatcher('pf').score('pdf'))
+    ok_(m.score('alfred-workflow') > m.score('xalfred-workflow'))
+    ok_(m.score('AlfredWorkflow') > m.score('Alfredworkflow'))
+
+    # consecutive characters.
+    ok_(FuzzyMatcher('alf').score('alfred') >
+        FuzzyMatcher('alf').score('a_l_f'))
+
+    # short candidate is preferred.
+    ok_(m.score('aw') > m.score('aw' + 'x' * 10))
+
+
+def test_case():
+    # smart case.
+    eq_(FuzzyMatcher('alf').score('ALFRED') is None, False)
+    eq_(FuzzyMatcher('Alf').score('alfred'), None)
+    eq_(FuzzyMatcher('Alf', case_sensitive=False).score('alfred') is None,
+        False)
+    eq_(FuzzyMatcher('alf', case_sensitive=True).score('ALFRED'), None)
+
+    ok_(FuzzyMatcher('alf').score('alfred') >
+        FuzzyMatcher('alf').score('ALFRED'))
+
+
+def test_search():
+    candidates = ['pdf', 'python-alfred-workflows', 'alfred', 'tmp/pf',
+                  'Pf', 'pf']
+
+    eq_([c for _, c in search('pf', candidates)],
+        ['pf', 'Pf', 'tmp/pf', 'pdf', 'python-alfred-workflows'])
+    eq_([c for _, c in search('pf', candidates, limit=2)], ['pf', 'Pf'])
+    eq_(search('pf', candidates, limit=0), [])
+
+    matched = []
+    eq_(len(FuzzyMatcher('pf').search(candidates, limit=0, matched=matched)),
+        0)
+    eq_(matched, ['pdf', 'python-alfred-workflows', 'tmp/pf', 'Pf', 'pf'])
+    eq_(search('xyz', candidates), [])
+    eq_(len(search('pf', candidates, limit=None)), 5)
+
+    # empty query keeps order.
+    eq_(search('', candidates, limit=3),
+        [(0.0, 'pdf'), (0.0, 'python-alfred-workflows'), (0.0, 'alfred')])
+
+
+def test_search_tie():
+    candidates = ['b', 'a', 'b', 'a']
+
+    eq_([(round(s, 2), c) for s, c in search('a', candidates)],
+        [(4.19, 'a'), (4.19, 'a')])
+    results = search('x', [('x', 1), ('x', 2), ('x', 3)],
+                     key=lambda c: c[0], limit=2)
+    eq_([c for _, c in results], [('x', 1), ('x', 2)])
+
+
+def test_search_large():
+    candidates = ['file_{0}.txt'.format(i) for i in range(1000)]
+    candidates.append('f.txt')
+
+    results = search('ft', candidates, limit=3)
+    eq_([c for _, c in results], ['f.txt', 'file_0.txt', 'file_1.txt'])
+    eq_(len(search('99', candidates, limit=None)), 28)
+
+
+def test_search_new_line():
+    eq_([c for _, c in search('ab', ['a\nb', 'c', 'ab'])], ['ab', 'a\nb'])
+    eq_([c for _, c in search('c', ['a\nb', 'c', 'ab'])], ['c'])
+
+
+def test_search_unicode():
+    candidates = [u'İstanbul', u'ファイル.txt',
+                  u'istanbul']
+
+    eq_([c for _, c in search(u'st', candidates)],
+        [u'İstanbul', u'istanbul'])
+    eq_([c for _, c in search(u'フt', candidates)],
+        [u'ファイル.txt'])
+    eq_([c for _, c in search(u'ファ', candidates)],
+        [u'ファイル.txt'])
+
+
+def test_extend_matches():
+    manager = ScriptFilterManager()
+    records = [('readme.md', 'icon.png'),
+               {'title': 'main.py', 'icon_path_or_name': 'icon.png'},
+               ('setup.py', 'icon.png')]
+
+    eq_(extend_matches(manager, 'py', records), 2)
+    eq_([i.sub_elements[0].text for i in manager._items.sub_elements],
+        ['main.py', 'setup.py'])
+
+
+def test_parallel_search():
+    candidates = ['file_{0}.txt'.format(i % 50) for i in range(1000)]
+    candidates.append('f.txt')
+
+    for q in ['ft', '1', 'F', 'xyz', '']:
+        eq_(parallel_search(q, candidates, processes=3, threshold=0),
+            search(q, candidates))
+    eq_(parallel_search('ft', candidates, limit=None, processes=3,
+                        threshold=0),
+        search('ft', candidates, limit=None))
+
+    # serial under threshold.
+    eq_(parallel_search('ft', candidates, processes=3),
+        search('ft', candidates))
+
+    records = [(c, 'icon.png') for c in candidates]
+    with closing(multiprocessing.Pool(2)) as pool:
+        eq_(parallel_search('f1', records, key=lambda r: r[0], limit=5,
+                            threshold=0, pool=pool),
+            search('f1', records, key=lambda r: r[0], limit=5))
+
+    manager = ScriptFilterManager()
+    eq_(extend_matches(manager, 'ft', records, processes=2), 20)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+from nose.tools import eq_, assert_raises, with_setup
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(top_dir, 'examples', 'shovel'))
+
+from _package import Packager, collect, compile_files, bundle_files  # noqa
+
+
+work_dir = None
+
+
+def setup_work_dir():
+    global work_dir
+    work_dir = tempfile.mkdtemp()
+
+    src = os.path.join(work_dir, 'src')
+    os.makedirs(os.path.join(src, '__pycache__'))
+    for name, data in [('__init__.py', ''), ('mod.py', 'x = 1\n'),
+                       ('icon.png', 'png'),
+                       # stale bytecode of running in place.
+                       ('__init__.pyc', 'stale'), ('mod.pyc', 'stale'),
+                       ('mod.pyo', 'stale'),
+                       ('__pycache__/mod.cpython-36.pyc', 'stale')]:
+        with open(os.path.join(src, name), 'w') as f:
+            f.write(data)
+
+
+def teardown_work_dir():
+    shutil.rmtree(work_dir)
+
+
+def names(archive):
+    z = zipfile.ZipFile(archive)
+    try:
+        return z.namelist()
+    finally:
+        z.close()
+
+
+@with_setup(setup_work_dir, teardown_work_dir)
+def test_collect_skips_bytecode():
+    files = collect([(os.path.join(work_dir, 'src'), 'app')])
+    eq_(['app/__init__.py', 'app/icon.png', 'app/mod.py'],
+        [f[1] for f in files])
+
+    build_dir = os.path.join(work_dir, '_build')
+    archive = os.path.join(work_dir, 'a.zip')
+
+    Packager(build_dir).build(archive, compile_files(files, build_dir))
+    eq_(['app/__init__.pyc', 'app/icon.png', 'app/mod.pyc'], names(archive))
+
+    Packager(build_dir).build(archive,
+                              bundle_files(files, 'app', build_dir))
+    eq_(['app/__init__.py', 'app/bundle.zip', 'app/icon.png'],
+        names(archive))
+
+
+@with_setup(setup_work_dir, teardown_work_dir)
+def test_build_duplicate_names():
+    path = os.path.join(work_dir, 'src', 'mod.py')
+    archive = os.path.join(work_dir, 'a.zip')
+
+    with assert_raises(ValueError):
+        Packager(os.path.join(work_dir, '_build')).build(
+            archive, [(path, 'app/mod.py'), (path, 'app/mod.py')])
+    eq_(False, os.path.exists(archive))
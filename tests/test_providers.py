@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import sys
+import time
+import threading
+from StringIO import StringIO
+from nose.tools import eq_, ok_
+from workflows.providers import gather
+from workflows.script_filter import ScriptFilterManager
+
+
+def fake(title, delay):
+    def provider(cancel):
+        if cancel.wait(delay):
+            raise AssertionError('cancelled')
+        return [(title, 'icon.png')]
+
+    return provider
+
+
+def titles(manager):
+    return [i.sub_elements[0].text for i in manager._items.sub_elements]
+
+
+def test_priority_order():
+    manager = ScriptFilterManager()
+    spans = {}
+
+    def timed(title, delay):
+        provider = fake(title, delay)
+
+        def run(cancel):
+            start = time.time()
+            try:
+                return provider(cancel)
+            finally:
+                spans[title] = (start, time.time())
+
+        return run
+
+    providers = [timed('slow', 0.3), timed('fast', 0.0),
+                 timed('middle', 0.2)]
+    eq_(gather(manager, providers, timeout=5.0), [])
+
+    eq_(titles(manager), ['slow', 'fast', 'middle'])
+    # providers run concurrently, not one after another.
+    ok_(spans['middle'][0] < spans['slow'][1], spans)
+    ok_(spans['slow'][0] < spans['middle'][1], spans)
+
+
+def test_deadline():
+    manager = ScriptFilterManager()
+    cancelled = threading.Event()
+
+    def late(cancel):
+        cancel.wait(5)
+        cancelled.set()
+        return [('late', 'icon.png')]
+
+    providers = [late, fake('fast', 0.0)]
+
+    start = time.time()
+    eq_(gather(manager, providers, timeout=0.05), [late])
+    ok_(time.time() - start < 0.5)
+
+    eq_(titles(manager), ['fast'])
+    ok_(cancelled.wait(1))
+
+
+def test_error():
+    manager = ScriptFilterManager()
+
+    def broken(cancel):
+        raise ValueError('broken provider')
+
+    def generator(cancel):
+        yield {'title': 'generated', 'icon_path_or_name': 'icon.png'}
+
+    stderr, sys.stderr = sys.stderr, StringIO()
+    try:
+        eq_(gather(manager, [broken, generator]), [])
+        ok_('broken provider' in sys.stderr.getvalue())
+    finally:
+        sys.stderr = stderr
+
+    eq_(titles(manager), ['generated'])
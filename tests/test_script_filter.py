@@ -1,10 +1,18 @@
 # -*- coding: utf-8 -*-
 import os
+import json
+import time
+import shutil
+import tempfile
+from collections import namedtuple
 import xml.etree.ElementTree as etree
+from StringIO import StringIO
 from nose.tools import eq_, ok_, assert_raises
 from workflows.script_filter import (
-    Items, Item, Title, SubTitle, Icon, Text, ScriptFilterManager
+    Items, Item, Title, SubTitle, Icon, Text, ScriptFilterManager,
+    ItemTemplate, hash_uid, CounterUid, iterparse_items
 )
+from workflows.cache import ResultCache
 
 
 def assert_xml(expect, actual):
@@ -91,6 +99,11 @@ def test_script_xml_filter_format_with_manager():
     )
 
     assert_xml(a.getroot(), manager._items.build())
+    eq_(etree.tostring(manager._items.build()), manager.tostring())
+
+    out = StringIO()
+    manager.write(out)
+    eq_(manager.tostring(), out.getvalue())
 
 
 def test_item():
@@ -208,3 +221,526 @@ def test_text():
         e = Text('text')
         e.type = 'dummy'
     eq_("type must be ['copy', 'largetype', None]", str(ve.exception))
+
+
+def test_streaming():
+    expect = ScriptFilterManager()
+    expect.append_item('a', 'a.png', uid='a')
+    expect.append_item('b', 'b.png', uid='b')
+    expect.append_subtitle(1, 'b subtitle')
+
+    out = StringIO()
+    manager = ScriptFilterManager()
+    with manager.streaming(out):
+        eq_('<items>', out.getvalue())
+
+        manager.append_item('a', 'a.png', uid='a')
+        eq_('<items>', out.getvalue())
+
+        manager.append_item('b', 'b.png', uid='b')
+        eq_('<items><item uid="a"><title>a</title><icon>a.png</icon></item>',
+            out.getvalue())
+
+        manager.append_subtitle(1, 'b subtitle')
+
+        with assert_raises(IndexError) as e:
+            manager.append_text(0, copy='a')
+        eq_('item was written to stream, already.', str(e.exception))
+
+    eq_(expect.tostring(), out.getvalue())
+
+
+def test_streaming_without_items():
+    out = StringIO()
+    with ScriptFilterManager().streaming(out):
+        pass
+    eq_('<items></items>', out.getvalue())
+
+
+def test_script_json_filter_format_with_manager():
+    manager = ScriptFilterManager()
+
+    manager.append_item('Desktop', '~/Desktop', subtitle='~/Desktop',
+                        uid='desktop', arg='~/Desktop', is_file=True,
+                        valid=True, autocomplete='Desktop',
+                        icon_type='fileicon')
+    manager.append_item('Flickr', 'flickr.png', uid='flickr',
+                        valid=False, autocomplete='flickr')
+    manager.append_item('My holiday photo', 'public.jpeg',
+                        subtitle='~/Pictures/My holiday photo.jpg',
+                        uid='image', autocomplete='My holiday photo',
+                        is_file=True, icon_type='filetype')
+    manager.append_item('Home Folder', '~/', uid='home', arg='~/', valid=True,
+                        autocomplete='Home', is_file=True,
+                        icon_type='fileicon')
+    manager.append_subtitle(3, 'Home folder ~/',
+                            shift='Subtext when shift is pressed',
+                            fn='Subtext when fn is pressed',
+                            ctrl='Subtext when ctrl is pressed',
+                            alt='Subtext when alt is pressed',
+                            cmd='Subtext when cmd is pressed')
+    manager.append_text(3, copy='Text when copying',
+                        largetype='Text for LargeType')
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'data', 'script_filter_json_format.json')) as f:
+        eq_(json.load(f), json.loads(manager.tojson()))
+
+
+def test_uid_strategy():
+    # default / uuid1
+    ok_(Item().uid != Item().uid)
+
+    # hash of title and arg
+    def uids():
+        manager = ScriptFilterManager(uid_strategy=hash_uid)
+        manager.append_item('a', 'icon.png', arg='arg')
+        manager.append_item('b', 'icon.png', arg='arg')
+        manager.append_item('c', 'icon.png', uid='fixed')
+        return [i.uid for i in manager._items.sub_elements]
+
+    first = uids()
+    eq_(first, uids())
+    ok_(first[0] != first[1])
+    eq_('fixed', first[2])
+
+    # counter
+    manager = ScriptFilterManager(uid_strategy=CounterUid(start=1))
+    manager.append_item('a', 'icon.png')
+    manager.append_item('b', 'icon.png')
+    eq_('<items><item uid="1"><title>a</title><icon>icon.png</icon></item>'
+        '<item uid="2"><title>b</title><icon>icon.png</icon></item></items>',
+        manager.tostring())
+
+    # omitted
+    manager = ScriptFilterManager(uid_strategy=None)
+    manager.append_item('a', 'icon.png')
+    eq_('<items><item><title>a</title><icon>icon.png</icon></item></items>',
+        manager.tostring())
+
+
+def test_extend_items():
+    Record = namedtuple('Record', ['title', 'icon_path_or_name', 'arg'])
+
+    def records():
+        yield ('a', 'a.png', 'a subtitle', 'a')
+        yield {'title': 'b', 'icon_path_or_name': 'b.png', 'uid': 'b',
+               'valid': False, 'icon_type': 'filetype', 'is_file': True}
+        yield Record('c', 'c.png', 'c arg')
+
+    manager = ScriptFilterManager(uid_strategy=None)
+    manager.extend_items(records())
+
+    expect = ScriptFilterManager(uid_strategy=None)
+    expect.append_item('a', 'a.png', 'a subtitle', 'a')
+    expect.append_item('b', 'b.png', uid='b', valid=False,
+                       icon_type='filetype', is_file=True)
+    expect.append_item('c', 'c.png', arg='c arg')
+
+    eq_(expect.tostring(), manager.tostring())
+    eq_('<item type="file" uid="b" valid="no"><title>b</title>'
+        '<icon type="filetype">b.png</icon></item>',
+        manager._items.sub_elements[1].tostring())
+
+
+def test_extend_items_with_invalid_value():
+    manager = ScriptFilterManager()
+
+    with assert_raises(ValueError) as e:
+        manager.extend_items([('a', 'a.png', None, None, None, 'dummy')])
+    eq_('valid must be [True, False, None]', str(e.exception))
+
+    with assert_raises(ValueError) as e:
+        manager.extend_items([{'title': 'a', 'icon_path_or_name': 'a.png',
+                               'icon_type': 'dummy'}])
+    eq_("type must be ['fileicon', 'filetype', None]", str(e.exception))
+
+
+def test_extend_items_with_streaming():
+    out = StringIO()
+    manager = ScriptFilterManager(uid_strategy=None)
+    with manager.streaming(out):
+        manager.extend_items([('a', 'a.png'), ('b', 'b.png')])
+        eq_('<items><item><title>a</title><icon>a.png</icon></item>',
+            out.getvalue())
+        eq_(1, len(manager._items.sub_elements))
+
+
+def test_tojson_rerun():
+    manager = ScriptFilterManager(uid_strategy=None)
+    manager.append_item('title', 'icon.png')
+
+    eq_(json.loads(manager.tojson(rerun=0.5, variables={'page': '2'})),
+        {'items': [{'title': 'title', 'icon': {'path': 'icon.png'}}],
+         'rerun': 0.5, 'variables': {'page': '2'}})
+    assert_raises(ValueError, manager.tojson, rerun=0.05)
+    assert_raises(ValueError, manager.tojson, rerun=5.5)
+
+
+def slow_records(n, delay):
+    for i in range(n):
+        time.sleep(delay)
+        yield ('title {0}'.format(i), 'icon.png')
+
+
+def test_run_budgeted():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache = ResultCache(cache_dir)
+
+        # finished within budget.
+        out = StringIO()
+        ok_(ScriptFilterManager().run_budgeted(
+            slow_records(3, 0), 1.0, cache, 'wf', 'fast', fp=out))
+        eq_(len(json.loads(out.getvalue())['items']), 3)
+        ok_('rerun' not in json.loads(out.getvalue()))
+        eq_(cache.get('wf', 'fast'), out.getvalue())
+
+        # cached.
+        out = StringIO()
+        ok_(ScriptFilterManager().run_budgeted(
+            iter([]), 1.0, cache, 'wf', 'fast', fp=out))
+        eq_(len(json.loads(out.getvalue())['items']), 3)
+
+        # partial output, and the rest is finished in background.
+        out = StringIO()
+        start = time.time()
+        ok_(not ScriptFilterManager().run_budgeted(
+            slow_records(20, 0.01), 0.05, cache, 'wf', 'slow',
+            rerun=0.2, variables={'partial': '1'}, fp=out))
+        ok_(time.time() - start < 0.15)
+
+        partial = json.loads(out.getvalue())
+        ok_(0 < len(partial['items']) < 20)
+        eq_(partial['rerun'], 0.2)
+        eq_(partial['variables'], {'partial': '1'})
+
+        # rerun before the background process finishes.
+        out = StringIO()
+        ok_(not ScriptFilterManager().run_budgeted(
+            slow_records(20, 0.01), 0.05, cache, 'wf', 'slow', fp=out))
+        ok_(cache.get('wf', 'slow\0pending') is not None)
+
+        for _ in range(100):
+            data = cache.get('wf', 'slow')
+            if data is not None:
+                break
+            time.sleep(0.02)
+
+        full = json.loads(data)
+        eq_([i['title'] for i in full['items']],
+            ['title {0}'.format(i) for i in range(20)])
+        ok_('rerun' not in full)
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def test_append_templated():
+    expect = ScriptFilterManager(uid_strategy=None)
+    actual = ScriptFilterManager(uid_strategy=None)
+    template = ItemTemplate('icon.png', icon_type='fileicon', valid=False,
+                            is_file=True, alt='alt text', cmd='cmd text')
+
+    for i in range(3):
+        expect.append_item('title {0}'.format(i), 'icon.png',
+                           subtitle='sub {0}'.format(i), uid='u{0}'.format(i),
+                           arg='arg', valid=False, icon_type='fileicon',
+                           is_file=True)
+        expect.append_subtitle(i, None, alt='alt text', cmd='cmd text')
+    expect.append_item('title', 'icon.png', valid=False,
+                       icon_type='fileicon', is_file=True)
+    expect.append_subtitle(3, None, alt='alt text', cmd='cmd text')
+
+    actual.append_templated(template, 'title 0', 'sub 0', 'u0', 'arg')
+    actual.extend_templated(template, [
+        ('title 1', 'sub 1', 'u1', 'arg'),
+        {'title': 'title 2', 'subtitle': 'sub 2', 'uid': 'u2', 'arg': 'arg'},
+    ])
+    actual.append_templated(template, 'title')
+
+    eq_(expect.tostring(), actual.tostring())
+    eq_(json.loads(expect.tojson()), json.loads(actual.tojson()))
+
+    # icon and sub titles are shared.
+    items = actual._items.sub_elements
+    ok_(items[0].sub_elements[2] is items[1].sub_elements[2])
+    ok_(items[0].sub_elements[2].frozen)
+
+    assert_raises(ValueError, ItemTemplate, 'icon.png', valid='yes')
+    assert_raises(ValueError, ItemTemplate, 'icon.png', icon_type='dummy')
+
+
+def test_append_templated_streaming():
+    template = ItemTemplate('icon.png', valid=True)
+    expect = ScriptFilterManager(uid_strategy=None)
+    expect.append_item('a', 'icon.png', valid=True)
+    expect.append_item('b', 'icon.png', valid=True)
+
+    out = StringIO()
+    manager = ScriptFilterManager(uid_strategy=None)
+    with manager.streaming(out):
+        manager.extend_templated(template, [('a',), ('b',)])
+
+    eq_(expect.tostring(), out.getvalue())
+
+
+def test_append_static():
+    import workflows.script_filter as sf
+
+    calls = []
+
+    def menu(manager):
+        calls.append(True)
+        manager.append_item(u'Settings & more', 'icon.png', arg='settings',
+                            valid=True, uid='settings')
+        manager.append_text(-1, copy='copy')
+        manager.append_item('Help', 'help.png', subtitle='<help>',
+                            valid=False, is_file=True)
+
+    expect = ScriptFilterManager(uid_strategy=hash_uid)
+    expect.append_item('dynamic', 'icon.png', uid='d')
+    menu(expect)
+    del calls[:]
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        for _ in range(2):
+            actual = ScriptFilterManager(uid_strategy=hash_uid)
+            actual.append_item('dynamic', 'icon.png', uid='d')
+            actual.append_static('menu', menu, cache_dir)
+
+            eq_(expect.tostring(), actual.tostring())
+            eq_(json.loads(expect.tojson()), json.loads(actual.tojson()))
+        eq_(len(calls), 1)
+
+        # loaded from disk by other process.
+        sf._static_items.clear()
+        actual = ScriptFilterManager(uid_strategy=hash_uid)
+        actual.append_item('dynamic', 'icon.png', uid='d')
+        actual.append_static('menu', menu, cache_dir)
+        eq_(expect.tostring(), actual.tostring())
+        eq_(len(calls), 1)
+        eq_(actual._items.sub_elements[1].uid, 'settings')
+
+        assert_raises(ValueError, actual.append_subtitle, 1, 'sub')
+
+        # only in this process.
+        actual.append_static('memory', menu, False)
+        eq_(len(calls), 2)
+        eq_(len(os.listdir(cache_dir)), 1)
+    finally:
+        sf._static_items.clear()
+        shutil.rmtree(cache_dir)
+
+
+def test_append_static_streaming():
+    import workflows.script_filter as sf
+
+    def menu(manager):
+        manager.append_item('Settings', 'icon.png', arg='settings')
+        manager.append_item('Help', 'icon.png', arg='help')
+
+    expect = ScriptFilterManager(uid_strategy=None)
+    expect.append_item('a', 'icon.png')
+    menu(expect)
+
+    out = StringIO()
+    manager = ScriptFilterManager(uid_strategy=None)
+    try:
+        with manager.streaming(out):
+            manager.append_item('a', 'icon.png')
+            manager.append_static('streaming menu', menu, False)
+    finally:
+        sf._static_items.clear()
+
+    eq_(expect.tostring(), out.getvalue())
+
+
+def test_append_ranked():
+    manager = ScriptFilterManager(uid_strategy=None)
+    manager.append_item('plain', 'icon.png')
+    manager.append_ranked(1.0, ('low', 'icon.png'))
+    manager.append_ranked(3.0, {'title': 'high', 'icon_path_or_name': 'a'})
+    manager.append_ranked(2.0, ('first', 'icon.png'))
+    manager.extend_ranked([(2.0, ('second', 'icon.png'))])
+
+    expect = ScriptFilterManager(uid_strategy=None)
+    expect.extend_items([('plain', 'icon.png'), ('high', 'a'),
+                         ('first', 'icon.png'), ('second', 'icon.png'),
+                         ('low', 'icon.png')])
+
+    eq_(expect.tostring(), manager.tostring())
+    # materialized once.
+    eq_(expect.tostring(), manager.tostring())
+    eq_(json.loads(expect.tojson()), json.loads(manager.tojson()))
+
+
+def test_append_ranked_max_items():
+    def more(n):
+        return ('{0} more...'.format(n), 'more.png')
+
+    manager = ScriptFilterManager(uid_strategy=None, max_items=2, more=more)
+    for i in range(10):
+        manager.append_ranked(i % 5, ('item {0}'.format(i), 'i'))
+
+    expect = ScriptFilterManager(uid_strategy=None)
+    expect.extend_items([('item 4', 'i'), ('item 9', 'i'),
+                         ('8 more...', 'more.png')])
+    eq_(expect.tostring(), manager.tostring())
+
+    # without summary.
+    manager = ScriptFilterManager(uid_strategy=None, max_items=0)
+    manager.extend_ranked((i, ('item', 'i')) for i in range(3))
+    eq_('<items />', manager.tostring())
+
+
+def test_append_ranked_streaming():
+    manager = ScriptFilterManager(uid_strategy=None, max_items=1)
+    out = StringIO()
+    with manager.streaming(out):
+        manager.append_item('plain', 'icon.png')
+        manager.append_ranked(1.0, ('low', 'icon.png'))
+        manager.append_ranked(2.0, ('high', 'icon.png'))
+
+    expect = ScriptFilterManager(uid_strategy=None)
+    expect.extend_items([('plain', 'icon.png'), ('high', 'icon.png')])
+    eq_(expect.tostring(), out.getvalue())
+
+
+def test_append_subtitle_duplicate():
+    manager = ScriptFilterManager(uid_strategy=None)
+    manager.append_item('a', 'icon.png', subtitle='sub')
+
+    with assert_raises(ValueError) as e:
+        manager.append_subtitle(0, 'sub again')
+    eq_('Subtitle element exist.', str(e.exception))
+
+    # other modifiers can be added.
+    manager.append_subtitle(0, None, alt='alt')
+    with assert_raises(ValueError):
+        manager.append_subtitle(0, None, cmd='cmd', alt='alt again')
+    # nothing is added by the failed call.
+    eq_(['sub', 'alt'], [st.text for st in
+                         manager._item(0).findall(SubTitle)])
+
+    manager.append_text(0, copy='copy')
+    with assert_raises(ValueError) as e:
+        manager.append_text(0, copy='copy again')
+    eq_('Text element exist.', str(e.exception))
+    manager.append_text(0, largetype='large')
+    with assert_raises(ValueError):
+        manager.append_text(0, largetype='large again')
+
+
+def test_append_subtitle_after_replacing_in_place():
+    manager = ScriptFilterManager(uid_strategy=None)
+    manager.append_item('a', 'icon.png', subtitle='sub')
+    item = manager._item(0)
+    eq_(1, len(item.findall(SubTitle)))
+
+    # [Title, SubTitle, Icon] to [Title, Text, Icon]
+    item.sub_elements[1] = Text('t', type='copy')
+    eq_([], item.findall(SubTitle))
+    manager.append_subtitle(0, 'new')
+    eq_(['new'], [st.text for st in item.findall(SubTitle)])
+
+
+def test_append_subtitle_by_uid():
+    manager = ScriptFilterManager(uid_strategy=hash_uid)
+    manager.append_item('a', 'icon.png', uid='a')
+    manager.append_item('b', 'icon.png', uid='b')
+    manager.append_subtitle('b', 'sub b')
+
+    # indexed after the previous lookup.
+    manager.append_item('c', 'icon.png', arg='c')
+    manager.append_text(hash_uid(manager._item(2)), copy='copy c')
+    manager.append_subtitle('a', 'sub a')
+
+    expect = ScriptFilterManager(uid_strategy=hash_uid)
+    expect.append_item('a', 'icon.png', uid='a')
+    expect.append_item('b', 'icon.png', uid='b')
+    expect.append_item('c', 'icon.png', arg='c')
+    expect.append_subtitle(0, 'sub a')
+    expect.append_subtitle(1, 'sub b')
+    expect.append_text(2, copy='copy c')
+    eq_(expect.tostring(), manager.tostring())
+
+    assert_raises(KeyError, manager.append_subtitle, 'unknown', 'sub')
+
+
+def test_append_subtitle_by_uid_streaming():
+    out = StringIO()
+    manager = ScriptFilterManager()
+    with manager.streaming(out):
+        manager.append_item('a', 'icon.png', uid='a')
+        manager.append_item('b', 'icon.png', uid='b')
+        manager.append_subtitle('b', 'sub b')
+        # written before the first lookup by uid.
+        assert_raises(KeyError, manager.append_subtitle, 'a', 'sub a')
+
+        manager.append_item('c', 'icon.png', uid='c')
+        # written after the lookup. Written uids are forgotten.
+        assert_raises(KeyError, manager.append_subtitle, 'b', 'sub')
+        eq_({'c': 2}, manager._uid_index)
+        manager.append_text('c', copy='copy c')
+
+        # the following item of the same uid is found.
+        manager.append_item('d', 'icon.png', uid='c')
+        manager.append_subtitle('c', 'sub d')
+
+    ok_('<subtitle>sub b</subtitle>' in out.getvalue())
+    ok_('<text type="copy">copy c</text>' in out.getvalue())
+    ok_('<title>d</title><icon>icon.png</icon><subtitle>sub d</subtitle>' in
+        out.getvalue())
+
+
+def test_iterparse_items():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'data', 'script_filter_xml_format.xml')
+    items = list(iterparse_items(path))
+
+    eq_(['desktop', 'flickr', 'image', 'home'], [i.uid for i in items])
+    eq_([True, False, None, True],
+        [i.todict().get('valid') for i in items])
+    eq_(['Subtext when shift is pressed', 'Subtext when cmd is pressed'],
+        [st.text for st in items[3].findall(SubTitle)
+         if st.mod in ('shift', 'cmd')])
+    eq_('fileicon', items[3].find(Icon).type)
+    eq_(['copy', 'largetype'], [t.type for t in items[3].findall(Text)])
+
+    # round trip.
+    manager = ScriptFilterManager()
+    manager.extend_elements(items)
+    a = etree.parse(path)
+    assert_xml(a.getroot(), manager._items.build())
+
+    out = manager.tostring()
+    manager = ScriptFilterManager()
+    manager.extend_elements(iterparse_items(StringIO(out)))
+    eq_(out, manager.tostring())
+
+
+def test_iterparse_items_uid():
+    source = StringIO(u'<items><item valid="yes"><title>caf\xe9</title>'
+                      u'<icon>icon.png</icon></item></items>'.encode('utf-8'))
+    item, = iterparse_items(source)
+
+    # uid is not generated.
+    eq_(None, item.uid)
+    eq_('YES', item.valid)
+    eq_(u'caf\xe9', item.find(Title).text)
+
+
+def test_extend_elements_streaming():
+    source = ('<items><item uid="a"><title>a</title><icon>i</icon></item>'
+              '<item uid="b"><title>b</title><icon>i</icon></item></items>')
+
+    out = StringIO()
+    manager = ScriptFilterManager()
+    with manager.streaming(out):
+        manager.extend_elements(i for i in iterparse_items(StringIO(source))
+                                if i.uid == 'b')
+    eq_('<items><item uid="b"><title>b</title><icon>i</icon></item></items>',
+        out.getvalue())
+
+    assert_raises(TypeError, manager.extend_elements, [Title('a')])
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from StringIO import StringIO
+from nose.tools import eq_, ok_, with_setup
+from workflows.server import ScriptFilterServer
+from workflows.client import request
+
+
+work_dir = None
+
+
+def setup_work_dir():
+    global work_dir
+    work_dir = tempfile.mkdtemp()
+
+
+def teardown_work_dir():
+    shutil.rmtree(work_dir)
+
+
+def fill(manager, query):
+    manager.append_item(query, 'icon.png', uid='uid')
+
+
+def start(server):
+    ok_(server.bind())
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def output(query):
+    return ('<items><item uid="uid"><title>{0}</title>'
+            '<icon>icon.png</icon></item></items>'.format(query))
+
+
+@with_setup(setup_work_dir, teardown_work_dir)
+def test_request():
+    path = os.path.join(work_dir, 'sock')
+    eq_(False, request(path, 'a', StringIO()))
+
+    server = ScriptFilterServer(fill, path, idle_timeout=5, watch=[])
+    thread = start(server)
+
+    for query in ['a', 'ab', 'abc']:
+        out = StringIO()
+        ok_(request(path, query, out))
+        eq_(output(query), out.getvalue())
+
+    # other server can't listen on the same socket.
+    eq_(False, ScriptFilterServer(fill, path, watch=[]).bind())
+
+    server.close()
+    thread.join(1)
+    ok_(not os.path.exists(path))
+
+
+@with_setup(setup_work_dir, teardown_work_dir)
+def test_tojson():
+    path = os.path.join(work_dir, 'sock')
+    server = ScriptFilterServer(fill, path, idle_timeout=5, watch=[],
+                                tojson=True)
+    start(server)
+
+    out = StringIO()
+    ok_(request(path, 'a', out))
+    eq_({'items': [{'uid': 'uid', 'title': 'a',
+                    'icon': {'path': 'icon.png'}}]},
+        json.loads(out.getvalue()))
+    server.close()
+
+
+@with_setup(setup_work_dir, teardown_work_dir)
+def test_stale_socket():
+    path = os.path.join(work_dir, 'sock')
+    start(ScriptFilterServer(fill, path, idle_timeout=0.1, watch=[]))
+    time.sleep(0.3)
+
+    # socket file left by killed server.
+    open(path, 'w').close()
+
+    server = ScriptFilterServer(fill, path, idle_timeout=5, watch=[])
+    start(server)
+    out = StringIO()
+    ok_(request(path, 'a', out))
+    eq_(output('a'), out.getvalue())
+    server.close()
+
+
+@with_setup(setup_work_dir, teardown_work_dir)
+def test_idle_timeout():
+    path = os.path.join(work_dir, 'sock')
+    thread = start(ScriptFilterServer(fill, path, idle_timeout=0.1,
+                                      watch=[]))
+    thread.join(2)
+
+    ok_(not thread.is_alive())
+    ok_(not os.path.exists(path))
+
+
+@with_setup(setup_work_dir, teardown_work_dir)
+def test_restart_by_change():
+    path = os.path.join(work_dir, 'sock')
+    source = os.path.join(work_dir, 'command.py')
+    open(source, 'w').close()
+
+    thread = start(ScriptFilterServer(fill, path, idle_timeout=5,
+                                      watch=[source]))
+    ok_(request(path, 'a', StringIO()))
+
+    mtime = os.stat(source).st_mtime
+    os.utime(source, (mtime + 10, mtime + 10))
+
+    eq_(False, request(path, 'a', StringIO()))
+    thread.join(2)
+    ok_(not thread.is_alive())
+    ok_(not os.path.exists(path))
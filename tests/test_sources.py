@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import sys
+import time
+from StringIO import StringIO
+from nose.tools import eq_, ok_
+from workflows.sources import command_lines, extend_command
+from workflows.script_filter import ScriptFilterManager
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+def titles(manager):
+    return [i.sub_elements[0].text for i in manager._items.sub_elements]
+
+
+def test_command_lines():
+    lines = command_lines(python(
+        'import sys; sys.stdout.write("a\\nb\\r\\n\\nlast")'))
+    eq_(['a', 'b', '', 'last'], list(lines))
+
+    eq_([], list(command_lines(['true'])))
+
+
+def test_command_lines_timeout():
+    start = time.time()
+    lines = command_lines(python(
+        'import sys, time\n'
+        'sys.stdout.write("a\\n"); sys.stdout.flush()\n'
+        'time.sleep(5)\n'
+        'print("b")'), timeout=0.3)
+
+    eq_(['a'], list(lines))
+    ok_(time.time() - start < 2.0)
+
+
+def test_extend_command():
+    manager = ScriptFilterManager(uid_strategy=None)
+
+    def record(line):
+        if line.startswith('#'):
+            return None
+        return (line, 'icon.png')
+
+    count = extend_command(manager, ['printf', 'a\\n#b\\nc\\n'], record)
+    eq_(2, count)
+    eq_(['a', 'c'], titles(manager))
+
+
+def test_extend_command_limit():
+    manager = ScriptFilterManager(uid_strategy=None)
+
+    # the command never exits by itself.
+    start = time.time()
+    count = extend_command(manager, ['yes'], lambda l: (l, 'icon.png'),
+                           limit=5)
+    eq_(5, count)
+    eq_(['y'] * 5, titles(manager))
+    ok_(time.time() - start < 2.0)
+
+    eq_(0, extend_command(manager, ['yes'], None, limit=0))
+
+
+def test_extend_command_streaming():
+    out = StringIO()
+    manager = ScriptFilterManager(uid_strategy=None)
+    with manager.streaming(out):
+        extend_command(manager, ['printf', 'a\\nb\\n'],
+                       lambda l: (l, 'icon.png'), limit=None)
+
+    expect = ScriptFilterManager(uid_strategy=None)
+    expect.extend_items([('a', 'icon.png'), ('b', 'icon.png')])
+    eq_(expect.tostring(), out.getvalue())
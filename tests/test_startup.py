@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import subprocess
+from nose.tools import ok_
+
+
+# import and minimal tostring() of script filter.
+SCRIPT = '''
+import sys
+import workflows.script_filter as sf
+manager = sf.ScriptFilterManager()
+manager.append_item('title', 'icon.png', uid='uid')
+manager.tostring()
+'''
+
+# modules which must be loaded only on the code path which needs them.
+# Startup time is measured by benchmarks/bench_startup.py.
+LAZY_MODULES = ['uuid', 'xml.etree.ElementTree', 'json', 'hashlib',
+                'tempfile', 'heapq', 'itertools', 'contextlib', 'time']
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_lazy_modules():
+    out = subprocess.check_output([
+        sys.executable, '-c',
+        SCRIPT + 'print(" ".join(m for m in {0!r} if m in sys.modules))'.
+        format(LAZY_MODULES)
+    ], cwd=top_dir)
+    ok_(not out.strip(), 'loaded eagerly: {0}'.format(out.strip()))
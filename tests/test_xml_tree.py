@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 import xml.etree.ElementTree as etree
-from nose.tools import eq_, assert_raises
-from workflows.commons.xml_tree import Element
+from StringIO import StringIO
+from nose.tools import eq_, ok_, assert_raises
+from workflows.commons.xml_tree import Element, iterparse
 
 
 class SubItem(Element):
@@ -15,6 +16,11 @@ class Item(Element):
     __sub_elements__ = [SubItem]
 
 
+class Parent(Element):
+    __element_name__ = 'parent'
+    __sub_elements__ = [Item]
+
+
 def test_metaclass():
     with assert_raises(ValueError) as e:
         class ElementNameNotString(Element):
@@ -135,3 +141,191 @@ def test_depth_1_with_multiple_nodes():
     e = Item()
     e.append(SubItem()).append(SubItem())
     eq_('<item><subitem /><subitem /></item>', etree.tostring(e.build()))
+
+
+def test_tostring_is_same_as_etree():
+    e = Item('item text', type='abc')
+    e.append(SubItem('sub text', type='def')).append(SubItem())
+    eq_(etree.tostring(e.build()), e.tostring())
+
+    eq_('<item />', Item().tostring())
+    eq_('<item type="abc" />', Item(type='abc').tostring())
+
+
+def test_tostring_escape():
+    e = Item('<a & b>', type='"x"\n<y> & z')
+    e.append(SubItem(u'あ'))
+    eq_(etree.tostring(e.build()), e.tostring())
+    eq_('<item type="&quot;x&quot;&#10;&lt;y&gt; &amp; z">'
+        '&lt;a &amp; b&gt;<subitem>&#12354;</subitem></item>',
+        e.tostring())
+
+
+def test_tostring_attribute_order():
+    class Multi(Element):
+        __element_name__ = 'multi'
+        __attributes__ = ['z', 'a', 'm']
+
+    e = Multi(z='1', a='2', m='3')
+    eq_(etree.tostring(e.build()), e.tostring())
+
+
+def test_tostring_with_invalid_attribute():
+    with assert_raises(TypeError) as e:
+        Item(type=1).tostring()
+    eq_('cannot serialize 1 (type int)', str(e.exception))
+
+
+def test_write():
+    out = StringIO()
+    Item('text').write(out)
+    eq_('<item>text</item>', out.getvalue())
+
+
+def test_slots():
+    e = Item(type='abc')
+    ok_(not hasattr(e, '__dict__'))
+    eq_(('type',), Item.__slots__)
+
+    with assert_raises(AttributeError):
+        e.dummy = 'value'
+
+    class Customized(Element):
+        __element_name__ = 'tag'
+        __attributes__ = ['attr', 'plain']
+
+        @property
+        def attr(self):
+            return self._attr
+
+        @attr.setter
+        def attr(self, val):
+            self._attr = val.upper()
+
+    eq_(('_attr', '_Customized__attr', 'plain'), Customized.__slots__)
+
+    class Inherited(Customized):
+        __element_name__ = 'tag'
+        __attributes__ = ['attr', 'plain', 'extra']
+
+    eq_(('extra',), Inherited.__slots__)
+
+    e = Inherited(attr='a', plain='b', extra='c')
+    eq_({'attr': 'A', 'plain': 'b', 'extra': 'c'}, e.attributes)
+
+
+def test_slots_of_private_and_non_identifier():
+    class Book(Element):
+        __element_name__ = 'book'
+        __attributes__ = ['price', 'xml:lang', 'class']
+
+        @property
+        def price(self):
+            return self.__price
+
+        @price.setter
+        def price(self, val):
+            self.__price = val
+
+    e = Book(price='3', **{'xml:lang': 'ja', 'class': 'c'})
+    eq_('3', e.price)
+    eq_({'price': '3', 'xml:lang': 'ja', 'class': 'c'}, e.attributes)
+    eq_('<book class="c" price="3" xml:lang="ja" />', e.tostring())
+    eq_(etree.tostring(e.build()), e.tostring())
+
+    class Inherited(Book):
+        __element_name__ = 'book'
+
+    eq_((), Inherited.__slots__)
+    eq_('4', Inherited(price='4').price)
+
+
+def test_attribute_items():
+    class Multi(Element):
+        __element_name__ = 'multi'
+        __attributes__ = ['z', 'a', 'm']
+
+    class Inherited(Multi):
+        __element_name__ = 'multi'
+
+    eq_([('a', '2'), ('z', '1')], Multi(z='1', a='2')._attribute_items())
+    eq_([('m', '3')], Inherited(m='3')._attribute_items())
+    eq_([], SubItem()._attribute_items())
+
+
+def test_freeze():
+    e = Item('text', type='<a>')
+    e.append(SubItem('sub'))
+    expect = e.tostring()
+
+    ok_(not e.frozen)
+    ok_(e.freeze() is e)
+    ok_(e.frozen)
+    eq_(expect, e.tostring())
+
+    # shared by parents.
+    parent = Parent()
+    parent.append(e)
+    parent.append(e)
+    eq_('<parent>' + expect * 2 + '</parent>', parent.tostring())
+
+    with assert_raises(ValueError):
+        e.append(SubItem())
+
+
+def test_find():
+    parent = Parent()
+    eq_(None, parent.find(Item))
+    eq_([], parent.findall(Item))
+
+    a, b = Item('a'), Item('b')
+    parent.append(a).append(b)
+    ok_(parent.find(Item) is a)
+    eq_([a, b], parent.findall(Item))
+    eq_(None, parent.find(SubItem))
+
+    # appended to sub_elements directly after the lookup.
+    c = Item('c')
+    parent.sub_elements.append(c)
+    eq_([a, b, c], parent.findall(Item))
+
+    # other changes rebuild the index.
+    del parent.sub_elements[:2]
+    d = Item('d')
+    parent.sub_elements.append(d)
+    eq_([c, d], parent.findall(Item))
+
+    parent.sub_elements[:] = [d]
+    eq_([d], parent.findall(Item))
+
+    # replaced in place, not at the last position.
+    e, f = Item('e'), Item('f')
+    parent.append(e)
+    eq_([d, e], parent.findall(Item))
+    parent.sub_elements[0] = f
+    eq_([f, e], parent.findall(Item))
+    ok_(parent.find(Item) is f)
+
+
+def test_iterparse():
+    source = StringIO(
+        '<parent>\n'
+        '  <!-- comment -->\n'
+        '  <item type="a &amp; b">\n'
+        '    <subitem type="x">sub &lt;1&gt;</subitem>\n'
+        '    <unknown>ignored</unknown>\n'
+        '    <subitem />\n'
+        '  </item>\n'
+        '  <item unknown="ignored">text</item>\n'
+        '</parent>')
+
+    items = iterparse(source, Item)
+    first = next(items)
+    ok_(isinstance(first, Item))
+    eq_('a & b', first.type)
+    eq_(None, first.text)
+    eq_(['x', None], [se.type for se in first.sub_elements])
+    eq_('<item type="a &amp; b"><subitem type="x">sub &lt;1&gt;</subitem>'
+        '<subitem /></item>', first.tostring())
+
+    eq_(['<item>text</item>'], [i.tostring() for i in items])
@@ -0,0 +1,549 @@
+# -*- coding: utf-8 -*-
+import os
+import mmap
+import time
+import errno
+import fcntl
+import struct
+import hashlib
+from contextlib import contextmanager
+
+
+def _to_bytes(s):
+    return s if isinstance(s, bytes) else s.encode('utf-8')
+
+
+def _slice(mm, start, length):
+    '''Return a slice of mmap without copy.'''
+    try:
+        return memoryview(mm)[start:start + length]
+    except TypeError:
+        # mmap doesn't support memoryview in python 2.
+        return buffer(mm, start, length)  # noqa: F821
+
+
+def _mkstemp(directory):
+    import tempfile
+    return tempfile.mkstemp(dir=directory)
+
+
+def default_cache_dir():
+    '''
+    Return cache directory of the workflow.
+    It is given by Alfred as environment variable (Alfred 2.4 later).
+    If it is not defined, a directory in temporary directory is used.
+
+    Returns:
+        str: directory path.
+    '''
+    cache_dir = os.environ.get('alfred_workflow_cache')
+    if cache_dir:
+        return cache_dir
+
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), 'python-alfred-workflows')
+
+
+class _Cache(object):
+    '''Base class of caches. Subclass implements get and set.'''
+
+    def fetch(self, workflow, query, fill, tojson=False):
+        '''
+        Return cached output. If it is not cached, create output by **fill**
+        and store it.
+
+        Args:
+            workflow (str): workflow name. (ex. bundle id)
+            query (str): query of script filter.
+            fill (callable): function called with ScriptFilterManager and
+                query, which appends items to the manager.
+            tojson (bool, optional): If it is True, output is JSON format.
+
+        Returns:
+            bytes: output of script filter.
+        '''
+        data = self.get(workflow, query)
+        if data is not None:
+            return data
+
+        from .script_filter import ScriptFilterManager
+
+        manager = ScriptFilterManager()
+        fill(manager, query)
+        data = _to_bytes(manager.tojson() if tojson else manager.tostring())
+
+        self.set(workflow, query, data)
+
+        return data
+
+
+class ResultCache(_Cache):
+    '''
+    On-disk cache of script filter outputs keyed by workflow and query.
+    Alfred runs the script filter on every keystroke, so repeated or
+    backspaced queries can be returned from the cache.
+
+    Each entry is stored in one file. Entries older than **ttl** are
+    expired, and least recently used entries are evicted when the number
+    of entries or total size exceed the limits.
+
+        Examples::
+
+            def fill(manager, query):
+                for path in search(query):
+                    manager.append_item(path, path)
+
+            cache = ResultCache(ttl=30)
+            sys.stdout.write(cache.fetch('my.workflow', query, fill))
+
+    Args:
+        directory (str, optional): cache directory.
+            Default is the workflow cache directory of Alfred.
+        ttl (float, optional): seconds while entry is fresh.
+        max_entries (int, optional): maximum number of entries.
+        max_bytes (int, optional): maximum total size of entries.
+            If it is None, size is not limited.
+    '''
+
+    _suffix = '.cache'
+
+    def __init__(self, directory=None, ttl=60, max_entries=256,
+                 max_bytes=None):
+        self._directory = directory or default_cache_dir()
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _path(self, workflow, query):
+        key = _to_bytes(workflow) + b'\0' + _to_bytes(query)
+        return os.path.join(self._directory,
+                            hashlib.sha1(key).hexdigest() + self._suffix)
+
+    def get(self, workflow, query):
+        '''
+        Return cached output if it is fresh.
+
+        Args:
+            workflow (str): workflow name. (ex. bundle id)
+            query (str): query of script filter.
+
+        Returns:
+            bytes: cached output. If it doesn't exist, return None.
+        '''
+        path = self._path(workflow, query)
+
+        try:
+            mtime = os.stat(path).st_mtime
+            now = time.time()
+            if now - mtime > self._ttl:
+                os.remove(path)
+                return None
+
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            # access time is used as the order of LRU.
+            os.utime(path, (now, mtime))
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return None
+
+        return data
+
+    def set(self, workflow, query, data):
+        '''
+        Store output. And evict old entries.
+
+        Args:
+            workflow (str): workflow name. (ex. bundle id)
+            query (str): query of script filter.
+            data (bytes): output of script filter.
+        '''
+        data = _to_bytes(data)
+
+        if not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+
+        # write to temporary file and rename it, so reader never sees
+        # incomplete entry.
+        fd, tmp = _mkstemp(self._directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.rename(tmp, self._path(workflow, query))
+
+        self.evict()
+
+    def _entries(self):
+        '''Return list of (path, stat) of entries.'''
+        entries = []
+        for name in os.listdir(self._directory):
+            if not name.endswith(self._suffix):
+                continue
+
+            path = os.path.join(self._directory, name)
+            try:
+                entries.append((path, os.stat(path)))
+            except OSError:
+                pass
+
+        return entries
+
+    def evict(self):
+        '''Remove expired entries, and least recently used entries.'''
+        if not os.path.isdir(self._directory):
+            return
+
+        now = time.time()
+        entries = []
+        for path, st in self._entries():
+            if now - st.st_mtime > self._ttl:
+                self._remove(path)
+            else:
+                entries.append((path, st))
+
+        # the most recently used entry is first.
+        entries.sort(key=lambda e: e[1].st_atime, reverse=True)
+
+        total = 0
+        for i, (path, st) in enumerate(entries):
+            total += st.st_size
+            if (i >= self._max_entries or
+                    (self._max_bytes is not None and total > self._max_bytes)):
+                self._remove(path)
+
+    def clear(self):
+        '''Remove all entries.'''
+        if not os.path.isdir(self._directory):
+            return
+
+        for path, _ in self._entries():
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+
+class MappedResultCache(_Cache):
+    '''
+    On-disk cache of script filter outputs which is cheap to read from
+    a short-lived process. Usage is the same as **ResultCache**.
+
+    The store consists of two files.
+
+    * results.idx: hash index of fixed layout.
+      A header (magic, generation, capacity, number of used slots, size
+      of dead records) and slots of open addressing (key hash, data
+      offset, data length, expire time).
+    * results.<generation>.dat: append-only data file.
+      A record is key length, key and data.
+
+    Both files are memory-mapped, so lookup reads only a few pages and a
+    hit is returned as a slice of the mapped data without copy.
+    Overwritten and expired records remain in the data file until
+    **compact** is called. It is called automatically when the index is
+    full, when dead records are larger than live ones, or when the data
+    file exceeds **max_bytes**.
+    Writers are serialized by file lock. Readers don't lock, and map the
+    store again when other process replaced the index by compaction.
+
+    Args:
+        directory (str, optional): cache directory.
+            Default is the workflow cache directory of Alfred.
+        ttl (float, optional): seconds while entry is fresh.
+        capacity (int, optional): initial number of index slots.
+        max_bytes (int, optional): size of data file which triggers
+            compaction. If it is None, it is compacted only when dead
+            records are larger than live ones.
+    '''
+
+    _magic = b'AWFCIDX1'
+    _header = struct.Struct('<8sIIIQ4x')
+    _slot = struct.Struct('<QQI4xd')
+    _record = struct.Struct('<I')
+
+    def __init__(self, directory=None, ttl=60, capacity=1024,
+                 max_bytes=None):
+        self._directory = directory or default_cache_dir()
+        self._ttl = ttl
+        self._capacity = capacity
+        self._max_bytes = max_bytes
+
+        self._index_path = os.path.join(self._directory, 'results.idx')
+        self._index = None
+        self._index_id = None
+        self._data = None
+        self._generation = None
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _data_path(self, generation):
+        return os.path.join(self._directory,
+                            'results.{0}.dat'.format(generation))
+
+    @staticmethod
+    def _key(workflow, query):
+        key = _to_bytes(workflow) + b'\0' + _to_bytes(query)
+        h = struct.unpack('<Q', hashlib.sha1(key).digest()[:8])[0]
+
+        # 0 means an empty slot.
+        return key, h or 1
+
+    def _open(self):
+        '''Map index and data file. Return False if store doesn't exist.'''
+        try:
+            with open(self._index_path, 'rb') as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                st = os.fstat(f.fileno())
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return False
+
+        magic, generation = self._header.unpack_from(index, 0)[:2]
+        if magic != self._magic:
+            raise ValueError('invalid cache index: {0}'.
+                             format(self._index_path))
+
+        self._index = index
+        self._index_id = (st.st_dev, st.st_ino)
+        self._generation = generation
+        self._data = None
+
+        if not self._map_data():
+            # data file was compacted after reading index, so index has
+            # been replaced already.
+            return self._open()
+
+        return True
+
+    def _replaced(self):
+        '''Return True if other process replaced the mapped index.'''
+        try:
+            st = os.stat(self._index_path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return True
+
+        return (st.st_dev, st.st_ino) != self._index_id
+
+    def _map_data(self):
+        '''Map data file. Return False if it was removed by compaction.'''
+        try:
+            with open(self._data_path(self._generation), 'rb') as f:
+                if os.fstat(f.fileno()).st_size:
+                    self._data = mmap.mmap(f.fileno(), 0,
+                                           access=mmap.ACCESS_READ)
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return False
+
+        return True
+
+    def _lookup(self, key, h):
+        '''
+        Return (slot position, slot values) for key. If the key doesn't
+        exist, slot values is None and the position is an empty slot.
+        '''
+        index = self._index
+        capacity = self._header.unpack_from(index, 0)[2]
+        pos = h % capacity
+        probes = 0
+
+        while probes < capacity:
+            probes += 1
+            offset = self._header.size + pos * self._slot.size
+            slot = self._slot.unpack_from(index, offset)
+
+            if slot[0] == 0:
+                return pos, None
+
+            if slot[0] == h:
+                end = slot[1] + self._record.size + len(key) + slot[2]
+                if self._data is None or end > len(self._data):
+                    # data was appended after mapping.
+                    self._map_data()
+                    if self._data is None or end > len(self._data):
+                        return None, None
+
+                start = slot[1] + self._record.size
+                klen = self._record.unpack_from(self._data, slot[1])[0]
+                if klen == len(key) and self._data[start:start + klen] == key:
+                    return pos, slot
+
+            pos = (pos + 1) % capacity
+
+        return None, None
+
+    def get(self, workflow, query):
+        '''
+        Return cached output if it is fresh.
+
+        Args:
+            workflow (str): workflow name. (ex. bundle id)
+            query (str): query of script filter.
+
+        Returns:
+            buffer: cached output as a slice of the mapped data file.
+                It can be written to file-like object directly.
+                If it doesn't exist, return None.
+        '''
+        if self._index is None or self._replaced():
+            if not self._open():
+                return None
+
+        key, h = self._key(workflow, query)
+        _, slot = self._lookup(key, h)
+
+        if slot is None or slot[3] < time.time():
+            return None
+
+        start = slot[1] + self._record.size + len(key)
+        return _slice(self._data, start, slot[2])
+
+    @contextmanager
+    def _lock(self):
+        if not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+
+        with open(os.path.join(self._directory, 'results.lock'), 'w') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                # other process may have rebuilt the store.
+                if not self._open():
+                    self._create([], self._capacity, 0)
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def set(self, workflow, query, data):
+        '''
+        Store output.
+
+        Args:
+            workflow (str): workflow name. (ex. bundle id)
+            query (str): query of script filter.
+            data (bytes): output of script filter.
+        '''
+        data = _to_bytes(data)
+        key, h = self._key(workflow, query)
+
+        with self._lock():
+            _, _, capacity, used, dead = self._header.unpack_from(
+                self._index, 0)
+            pos, slot = self._lookup(key, h)
+
+            if slot is None and (pos is None or (used + 1) * 2 > capacity):
+                # keep load factor of index under 0.5.
+                self._compact()
+                _, _, capacity, used, dead = self._header.unpack_from(
+                    self._index, 0)
+                pos, slot = self._lookup(key, h)
+
+            data_path = self._data_path(self._generation)
+            with open(data_path, 'ab') as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(self._record.pack(len(key)) + key + data)
+                size = f.tell()
+
+            if slot is None:
+                used += 1
+            else:
+                # the overwritten record is dead.
+                dead += self._record.size + len(key) + slot[2]
+
+            with open(self._index_path, 'r+b') as f:
+                f.write(self._header.pack(self._magic, self._generation,
+                                          capacity, used, dead))
+                f.seek(self._header.size + pos * self._slot.size)
+                f.write(self._slot.pack(h, offset, len(data),
+                                        time.time() + self._ttl))
+
+            if dead * 2 > size or (self._max_bytes is not None and
+                                   size > self._max_bytes):
+                self._compact()
+
+    def _entries(self):
+        '''Yield (key hash, key, data, expire time) of fresh entries.'''
+        index = self._index
+        capacity = self._header.unpack_from(index, 0)[2]
+        now = time.time()
+
+        for pos in range(capacity):
+            h, offset, length, expires = self._slot.unpack_from(
+                index, self._header.size + pos * self._slot.size
+            )
+            if h == 0 or expires < now:
+                continue
+
+            if (self._data is None or
+                    offset + self._record.size > len(self._data)):
+                self._map_data()
+
+            klen = self._record.unpack_from(self._data, offset)[0]
+            start = offset + self._record.size
+            yield (h, self._data[start:start + klen],
+                   self._data[start + klen:start + klen + length], expires)
+
+    def _create(self, entries, capacity, generation):
+        '''Write a new store of **entries**, and map it.'''
+        slots = [None] * capacity
+        with open(self._data_path(generation), 'wb') as f:
+            for h, key, data, expires in entries:
+                pos = h % capacity
+                while slots[pos] is not None:
+                    pos = (pos + 1) % capacity
+                slots[pos] = (h, f.tell(), len(data), expires)
+                f.write(self._record.pack(len(key)) + key + data)
+
+        empty = self._slot.pack(0, 0, 0, 0)
+        fd, tmp = _mkstemp(self._directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self._header.pack(self._magic, generation, capacity,
+                                      len(entries), 0))
+            f.write(b''.join(empty if s is None else self._slot.pack(*s)
+                             for s in slots))
+        os.rename(tmp, self._index_path)
+
+        self._open()
+
+    def _compact(self):
+        old = self._data_path(self._generation)
+        entries = list(self._entries())
+
+        # the index is sized by fresh entries, so expired entries don't
+        # grow it. It is doubled only when they need the room, and keeps
+        # room for as many new entries.
+        capacity = max(self._capacity, 1)
+        while (len(entries) * 2 + 1) * 2 > capacity:
+            capacity *= 2
+
+        self._create(entries, capacity, self._generation + 1)
+
+        # process which maps the old file can still read it.
+        os.remove(old)
+
+    def compact(self):
+        '''Reclaim space of overwritten and expired entries.'''
+        with self._lock():
+            self._compact()
+
+    def clear(self):
+        '''Remove all entries.'''
+        with self._lock():
+            old = self._data_path(self._generation)
+            self._create([], self._capacity, self._generation + 1)
+            os.remove(old)
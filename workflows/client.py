@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+'''
+Tiny client of **workflows.server**. It imports only modules which are
+cheap to load, so the process started by Alfred on each keystroke exits
+quickly.
+
+    Examples::
+
+        # client.py, which is called by Alfred as: python client.py "{query}"
+        import sys
+        from workflows.client import main
+
+        main('/tmp/my.workflow.sock', [sys.executable, 'server.py'])
+'''
+import os
+import sys
+import time
+import socket
+
+
+def request(socket_path, query, out=None):
+    '''
+    Send query to the server, and write its output to **out**.
+
+    Args:
+        socket_path (str): path of Unix domain socket.
+        query (str): query of script filter.
+        out (file, optional): file-like object. Default is sys.stdout.
+
+    Returns:
+        bool: False if the server is not available.
+    '''
+    if out is None:
+        out = getattr(sys.stdout, 'buffer', sys.stdout)
+    if not isinstance(query, bytes):
+        query = query.encode('utf-8')
+
+    received = False
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(socket_path)
+        s.sendall(query)
+        s.shutdown(socket.SHUT_WR)
+
+        while True:
+            data = s.recv(65536)
+            if not data:
+                break
+            out.write(data)
+            received = True
+    except socket.error:
+        pass
+    finally:
+        s.close()
+
+    return received
+
+
+def start_server(command):
+    '''
+    Start the server in background.
+
+    Args:
+        command (list of str): command of server script.
+            "--serve" is appended to it.
+    '''
+    import subprocess
+
+    with open(os.devnull, 'r+b') as null:
+        subprocess.Popen(list(command) + ['--serve'],
+                         stdin=null, stdout=null, stderr=null,
+                         close_fds=True, preexec_fn=os.setsid)
+
+
+def main(socket_path, command, query=None, timeout=2.0):
+    '''
+    Entry point of client script. Forward the query to the server.
+    If the server is not running, start it and retry. If it doesn't start
+    in **timeout** seconds, handle the query by the server script in this
+    process.
+
+    Args:
+        socket_path (str): path of Unix domain socket.
+        command (list of str): command of server script.
+        query (str, optional): query. Default is sys.argv[1].
+        timeout (float, optional): seconds to wait for server startup.
+    '''
+    if query is None:
+        query = sys.argv[1] if len(sys.argv) > 1 else ''
+
+    if request(socket_path, query):
+        return
+
+    start_server(command)
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if request(socket_path, query):
+            return
+        time.sleep(0.01)
+
+    os.execv(command[0], list(command) + [query])
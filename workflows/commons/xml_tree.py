@@ -1,21 +1,116 @@
 # -*- coding: utf-8 -*-
-import xml.etree.ElementTree as etree
 
 
-def getter(attr):
-    '''getter method'''
-    def _getter(self):
-        return getattr(self, '__{0}'.format(attr))
+def _serialization_error(text):
+    raise TypeError(
+        'cannot serialize {0!r} (type {1})'.format(text, type(text).__name__)
+    )
 
-    return _getter
 
+def _escape_cdata(text):
+    '''Escape character data in the same way as xml.etree.ElementTree.'''
+    try:
+        if '&' in text:
+            text = text.replace('&', '&amp;')
+        if '<' in text:
+            text = text.replace('<', '&lt;')
+        if '>' in text:
+            text = text.replace('>', '&gt;')
+        return text
+    except (TypeError, AttributeError):
+        _serialization_error(text)
 
-def setter(attr):
-    '''setter method'''
-    def _setter(self, val):
-        setattr(self, '__{0}'.format(attr), val)
 
-    return _setter
+def _escape_attrib(text):
+    '''Escape attribute value in the same way as xml.etree.ElementTree.'''
+    try:
+        if '&' in text:
+            text = text.replace('&', '&amp;')
+        if '<' in text:
+            text = text.replace('<', '&lt;')
+        if '>' in text:
+            text = text.replace('>', '&gt;')
+        if '"' in text:
+            text = text.replace('"', '&quot;')
+        if '\n' in text:
+            text = text.replace('\n', '&#10;')
+        return text
+    except (TypeError, AttributeError):
+        _serialization_error(text)
+
+
+def _defined_in(bases, name):
+    '''Return True if **name** is defined in **bases** or their parents.'''
+    return any(name in c.__dict__ for b in bases for c in b.__mro__)
+
+
+def _compile(src):
+    '''Compile source lines of a function definition. And return it.'''
+    namespace = {}
+    exec('\n'.join(src), namespace)
+
+    return namespace[src[0].split()[1].split('(')[0]]
+
+
+def _is_identifier(name):
+    '''Return True if **name** can be a slot. (ex. not "xml:lang")'''
+    return ((name[:1].isalpha() or name[:1] == '_') and
+            name.replace('_', 'a').isalnum())
+
+
+def _is_plain(name):
+    '''Return True if **name** can be accessed as "self.<name>".'''
+    from keyword import iskeyword
+    return _is_identifier(name) and not iskeyword(name)
+
+
+def _attribute_items(attributes):
+    '''
+    Generate a function which extracts attributes of an element as a list of
+    (name, value) in lexical order. None value is excluded.
+    '''
+    src = ['def _attribute_items(self):', '    items = []']
+    for name in sorted(attributes):
+        get = ('self.{0}' if _is_plain(name) else 'getattr(self, {0!r})')
+        src.extend([
+            '    v = ' + get.format(name),
+            '    if v is not None:',
+            '        items.append(({0!r}, v))'.format(name),
+        ])
+    src.append('    return items')
+
+    return _compile(src)
+
+
+def _init_attributes(attributes):
+    '''
+    Generate a function which sets attributes of an element from dict.
+    Missing attribute is set None.
+    '''
+    src = ['def _init_attributes(self, kwargs):', '    get = kwargs.get']
+    for name in attributes:
+        if _is_plain(name):
+            src.append('    self.{0} = get({0!r})'.format(name))
+        else:
+            src.append('    setattr(self, {0!r}, get({0!r}))'.format(name))
+
+    return _compile(src)
+
+
+class _Generated(object):
+    '''
+    Descriptor which generates a function from __attributes__ of the class
+    at the first access, and replaces itself with it. Generation is
+    deferred, so it doesn't cost for importing.
+    '''
+    def __init__(self, generate):
+        self._generate = generate
+
+    def __get__(self, obj, cls):
+        func = self._generate(cls.__attributes__)
+        setattr(cls, func.__name__, func)
+
+        return getattr(cls if obj is None else obj, func.__name__)
 
 
 class ElementMeta(type):
@@ -34,7 +129,14 @@ class ElementMeta(type):
                     format(se.__class__.__name__)
                 )
 
-        # generate getter/setter
+        # generate __slots__. An attribute without user defined property
+        # is stored in the slot of the same name directly, one with
+        # property can use the slot named "_" + attribute name, or the
+        # private name of the class ("self.__" + attribute name).
+        # An attribute which isn't an identifier (ex. "xml:lang") is
+        # stored in __dict__.
+        slots = list(cls_dict.get('__slots__', []))
+        private = '_{0}__'.format(cls_name.lstrip('_'))
         for attr in cls_dict.get('__attributes__', []):
             if not isinstance(attr, str):
                 raise ValueError(
@@ -42,10 +144,31 @@ class ElementMeta(type):
                     format(attr.__class__.__name__)
                 )
 
-            if attr not in cls_dict.keys():
-                cls_dict[attr] = property(getter(attr), setter(attr))
+            if not _is_identifier(attr):
+                names = ['__dict__']
+            elif attr in cls_dict:
+                names = ['_' + attr]
+                if cls_name.lstrip('_'):
+                    names.append(private + attr)
+            else:
+                names = [attr]
+
+            for name in names:
+                if name not in slots and not _defined_in(cls_bases, name):
+                    slots.append(name)
+
+        cls_dict['__slots__'] = tuple(slots)
+
+        # precompile attribute handling which is used in hot paths.
+        cls_dict['_attribute_items'] = _Generated(_attribute_items)
+        cls_dict['_init_attributes'] = _Generated(_init_attributes)
 
-        return type.__new__(cls, cls_name, cls_bases, cls_dict)
+        new_cls = type.__new__(cls, cls_name, cls_bases, cls_dict)
+        new_cls._sub_element_types = tuple(new_cls.__sub_elements__)
+        new_cls._sub_element_names = dict(
+            (se.__element_name__, se) for se in new_cls._sub_element_types)
+
+        return new_cls
 
 
 class Element(object):
@@ -77,10 +200,35 @@ class Element(object):
         #    <author>aaa</author>
         # </book>
         book.build()
+
+        # or serialize it directly without building xml object.
+        book.tostring()
+
+    Elements have __slots__ generated by ElementMeta, so an instance
+    can't have attributes other than the slots. An attribute in
+    __attributes__ is stored in the slot of the same name. If the class
+    defines a property of the attribute, the property stores its value
+    in "self._<attr>" or "self.__<attr>". Other instance attributes must
+    be declared in __slots__ of the class. An attribute which isn't an
+    identifier (ex. "xml:lang") is stored in __dict__. ::
+        class Book(Element):
+            __element_name__ = 'book'
+            __attributes__ = ['name', 'price']
+            __slots__ = ['cache']
+
+            @property
+            def price(self):
+                return self._price
+
+            @price.setter
+            def price(self, val):
+                self._price = val
     '''
 
     __metaclass__ = ElementMeta
 
+    __slots__ = ['_text', '_sub_elements', '_fragment', '_child_index']
+
     ''' Define element name (Required / str) '''
     __element_name__ = ''
 
@@ -93,9 +241,37 @@ class Element(object):
     def __init__(self, text=None, **kwargs):
         self._text = text
         self._sub_elements = []
+        self._fragment = None
+        self._child_index = None
+
+        self._init_attributes(kwargs)
 
-        for a in self.__attributes__:
-            setattr(self, a, kwargs.get(a, None))
+    @classmethod
+    def _bare(cls, text=None):
+        '''
+        Create element without __init__ and attribute setters.
+        It is for hot paths which validate values by themselves,
+        and caller must set all attributes.
+        '''
+        e = object.__new__(cls)
+        e._text = text
+        e._sub_elements = []
+        e._fragment = None
+        e._child_index = None
+
+        return e
+
+    @classmethod
+    def _from_attributes(cls, text, attributes):
+        '''
+        Create element from text and attributes of parsed xml. Override it
+        if values in xml are different from values of attribute setters.
+        Unknown attributes are ignored.
+        '''
+        e = cls._bare(text)
+        e._init_attributes(attributes)
+
+        return e
 
     def __repr__(self):
         return '<{0} (name="{1}" text="{2}" attributes="{3}")>'.format(
@@ -112,8 +288,7 @@ class Element(object):
         Returns:
             dict: attributes
         '''
-        return {a: getattr(self, a) for a in self.__attributes__
-                if getattr(self, a) is not None}
+        return dict(self._attribute_items())
 
     @property
     def sub_elements(self):
@@ -135,6 +310,89 @@ class Element(object):
         '''
         return self._text
 
+    def _children(self):
+        '''
+        Return index of sub elements by type. {class: list of Element}
+        It is built at the first lookup, and sub elements appended after
+        that (including ones appended to sub_elements directly by hot
+        paths) are indexed at the next lookup. sub_elements is a public
+        list, so indexed elements are compared with it by identity, and
+        other changes than appending (ex. replacing an element in place)
+        rebuild the index.
+        '''
+        sub_elements = self._sub_elements
+        n = len(sub_elements)
+        cache = self._child_index
+        if cache is not None:
+            indexed, index = cache
+            count = len(indexed)
+            # Element doesn't define __eq__, so lists compare identities.
+            if n == count and sub_elements == indexed:
+                return index
+
+            if n < count or sub_elements[:count] != indexed:
+                cache = None
+
+        if cache is None:
+            count, index = 0, {}
+
+        for e in sub_elements[count:]:
+            index.setdefault(e.__class__, []).append(e)
+        self._child_index = (list(sub_elements), index)
+
+        return index
+
+    def find(self, cls):
+        '''
+        Return the first sub element of the type.
+
+        Args:
+            cls (ElementMeta): type of sub element.
+
+        Returns:
+            Element: sub element. If there is not, return None.
+        '''
+        found = self._children().get(cls)
+        return found[0] if found else None
+
+    def findall(self, cls):
+        '''
+        Return sub elements of the type in order.
+
+        Args:
+            cls (ElementMeta): type of sub element.
+
+        Returns:
+            list of Element: sub elements.
+        '''
+        return list(self._children().get(cls, ()))
+
+    @property
+    def frozen(self):
+        '''
+        Return True if the element is frozen.
+
+        Returns:
+            bool: frozen or not.
+        '''
+        return self._fragment is not None
+
+    def freeze(self):
+        '''
+        Serialize self once, and reuse the fragment for later
+        serialization. Frozen element can be shared by many parents
+        (flyweight), so it must not be changed after this.
+
+        Returns:
+            Element: self
+        '''
+        chunks = []
+        self._fragment = None
+        self.serialize(chunks.append)
+        self._fragment = ''.join(chunks)
+
+        return self
+
     def append(self, e):
         '''
         Append child element.
@@ -148,12 +406,16 @@ class Element(object):
         Raises:
             TypeError: If datatype of argument **e** is not defined
                        in __sub_elements__.
+            ValueError: If self is frozen.
         '''
-        if not isinstance(e, tuple(self.__sub_elements__)):
+        if self._fragment is not None:
+            raise ValueError('element is frozen.')
+
+        if not isinstance(e, self._sub_element_types):
             raise TypeError(
                 'element must be {0}. : {1}'.
                 format(
-                    [i.__name__ for i in tuple(self.__sub_elements__)],
+                    [i.__name__ for i in self._sub_element_types],
                     e.__class__.__name__
                 )
             )
@@ -173,12 +435,13 @@ class Element(object):
         Returns:
             xml.etree.ElementTree: xml tree object.
         '''
+        import xml.etree.ElementTree as etree
+
+        attrib = dict(self._attribute_items())
         if parent is None:
-            e = etree.Element(self.__element_name__, attrib=self.attributes)
+            e = etree.Element(self.__element_name__, attrib=attrib)
         else:
-            e = etree.SubElement(
-                parent, self.__element_name__, attrib=self.attributes
-            )
+            e = etree.SubElement(parent, self.__element_name__, attrib=attrib)
 
         if self._text:
             e.text = self._text
@@ -186,3 +449,111 @@ class Element(object):
         [se.build(parent=e) for se in self.sub_elements]
 
         return e
+
+    def serialize(self, write):
+        '''
+        Write xml of self to **write** directly, without building
+        xml tree object. Output is the same as ElementTree's one.
+
+        Args:
+            write (callable): function called with each xml chunk (str).
+        '''
+        if self._fragment is not None:
+            write(self._fragment)
+            return
+
+        name = self.__element_name__
+        write('<' + name)
+
+        for k, v in self._attribute_items():
+            write(' ' + k + '="' + _escape_attrib(v) + '"')
+
+        if self._text or self._sub_elements:
+            write('>')
+            if self._text:
+                write(_escape_cdata(self._text))
+            for se in self._sub_elements:
+                se.serialize(write)
+            write('</' + name + '>')
+        else:
+            write(' />')
+
+    def tostring(self):
+        '''
+        Return xml of self as us-ascii encoded string.
+        This is the same result as etree.tostring(self.build()).
+
+        Returns:
+            str: xml string.
+        '''
+        chunks = []
+        self.serialize(chunks.append)
+
+        return ''.join(chunks).encode('us-ascii', 'xmlcharrefreplace')
+
+    def write(self, fp):
+        '''
+        Write xml of self to file-like object.
+
+        Args:
+            fp (file): file-like object which has write method.
+        '''
+        fp.write(self.tostring())
+
+
+def _from_etree(cls, e):
+    text = e.text
+    if len(e) and text is not None and not text.strip():
+        # indent of pretty printed xml.
+        text = None
+
+    element = cls._from_attributes(text, e.attrib)
+    append = element._sub_elements.append
+    types = cls._sub_element_names
+    for child in e:
+        se = types.get(child.tag)
+        if se is not None:
+            append(_from_etree(se, child))
+
+    return element
+
+
+def iterparse(source, cls):
+    '''
+    Parse xml incrementally, and yield elements of **cls** one at a time.
+    Parsed parts of the document are discarded after each element is
+    yielded, so memory doesn't grow with the document. Sub elements are
+    created from __sub_elements__, and unknown elements, comments and
+    attributes are ignored.
+
+        Examples::
+
+            for book in iterparse('books.xml', Book):
+                print(book.tostring())
+
+    Args:
+        source (str or file): file name or file-like object of xml.
+        cls (ElementMeta): class of elements to yield.
+
+    Yields:
+        Element: element of **cls** with sub elements.
+    '''
+    try:
+        import xml.etree.cElementTree as etree
+    except ImportError:
+        import xml.etree.ElementTree as etree
+
+    name = cls.__element_name__
+    root = None
+
+    for event, e in etree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = e
+            continue
+
+        if e.tag == name:
+            yield _from_etree(cls, e)
+            # drop parsed elements from the tree being built.
+            e.clear()
+            root.clear()
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+import os
+import mmap
+import time
+import errno
+import struct
+import marshal
+from .cache import _mkstemp
+from .matching import FuzzyMatcher, _title
+
+
+_magic = b'AWFSIDX1'
+
+# magic, length of directory.
+_header = struct.Struct('<8sI')
+
+# start and end offsets in a blob.
+_range = struct.Struct('<II')
+
+
+def _pack(values):
+    return struct.pack('<{0}I'.format(len(values)), *values)
+
+
+def _unpack(buf, offset, count):
+    return list(struct.unpack_from('<{0}I'.format(count), buf, offset))
+
+
+def _marshalable(record):
+    '''Convert record of extend_items to the type marshal supports.'''
+    if isinstance(record, dict):
+        return record
+    if hasattr(record, '_asdict'):
+        return dict(record._asdict())
+
+    return tuple(record)
+
+
+def _is_subsequence(a, b):
+    it = iter(b)
+    return all(c in it for c in a)
+
+
+class SearchIndex(object):
+    '''
+    Search index of script filter records, persisted to a file.
+    It is built once from a candidate source, and each keystroke reads
+    only the parts of the file it needs through mmap.
+
+    A query reads candidates from the posting list of its rarest
+    character, not all of them. And the matched records are saved as
+    state, so that a query which extends the previous one (ex. "pro",
+    then "proj") narrows the previous result instead of rescanning.
+    Per-keystroke cost depends on the number of matches, not on the
+    number of records.
+
+        Examples::
+
+            # build once, ex. in a background job.
+            SearchIndex.build(path, ((p, 'icon.png') for p in paths))
+
+            # on each keystroke.
+            SearchIndex(path).extend_matches(manager, query)
+
+    Args:
+        path (str): file path of the index. State is saved to
+            path + ".state".
+    '''
+    def __init__(self, path):
+        self._path = path
+        self._state_path = path + '.state'
+        self._mm = None
+
+    @classmethod
+    def build(cls, path, records, key=_title):
+        '''
+        Build the index and write it to **path**. Existing index is
+        replaced atomically.
+
+        Args:
+            path (str): file path of the index.
+            records (iterable): records of
+                **ScriptFilterManager.extend_items**. namedtuple is stored
+                as dict.
+            key (callable, optional): function which returns text of
+                record. Default is title of record.
+
+        Returns:
+            SearchIndex: the index.
+        '''
+        texts = []
+        text_offsets = [0]
+        blobs = []
+        blob_offsets = [0]
+        postings = {}
+        is_unicode = False
+
+        for i, record in enumerate(records):
+            text = key(record)
+            for ch in set(text.lower()):
+                postings.setdefault(ch, []).append(i)
+
+            if not isinstance(text, bytes):
+                is_unicode = True
+                text = text.encode('utf-8')
+            # a candidate is a line in FuzzyMatcher.
+            text = text.replace(b'\n', b' ')
+
+            texts.append(text)
+            text_offsets.append(text_offsets[-1] + len(text))
+            blob = marshal.dumps(_marshalable(record))
+            blobs.append(blob)
+            blob_offsets.append(blob_offsets[-1] + len(blob))
+
+        sections = []
+        size = [0]
+
+        def add(data):
+            offset = size[0]
+            sections.append(data)
+            size[0] += len(data)
+            return offset
+
+        directory = {
+            'id': time.time(),
+            'count': len(texts),
+            'unicode': is_unicode,
+            'text': add(b''.join(texts)),
+            'text_offsets': add(_pack(text_offsets)),
+            'record': add(b''.join(blobs)),
+            'record_offsets': add(_pack(blob_offsets)),
+            'postings': dict((ch, (add(_pack(ids)), len(ids)))
+                             for ch, ids in postings.items()),
+        }
+        directory = marshal.dumps(directory)
+
+        # write to temporary file and rename it, so reader never sees
+        # incomplete index.
+        fd, tmp = _mkstemp(os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_header.pack(_magic, len(directory)))
+            f.write(directory)
+            for data in sections:
+                f.write(data)
+        os.rename(tmp, path)
+
+        return cls(path)
+
+    def _open(self):
+        if self._mm is not None:
+            return self._mm
+
+        with open(self._path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, length = _header.unpack_from(mm, 0)
+        if magic != _magic:
+            mm.close()
+            raise ValueError('{0} is not a search index.'.format(self._path))
+
+        self._directory = marshal.loads(mm[_header.size:
+                                           _header.size + length])
+        self._base = _header.size + length
+        self._mm = mm
+
+        return mm
+
+    def close(self):
+        '''Unmap the index file.'''
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __len__(self):
+        self._open()
+        return self._directory['count']
+
+    def _get(self, name, i):
+        mm = self._open()
+        base = self._base
+        d = self._directory
+
+        start, end = _range.unpack_from(
+            mm, base + d[name + '_offsets'] + 4 * i)
+        offset = base + d[name]
+
+        return mm[offset + start:offset + end]
+
+    def text(self, i):
+        '''
+        Return indexed text of the record.
+
+        Args:
+            i (int): record number.
+
+        Returns:
+            str: text.
+        '''
+        text = self._get('text', i)
+        return text.decode('utf-8') if self._directory['unicode'] else text
+
+    def _texts(self, ids):
+        mm = self._open()
+        d = self._directory
+        unpack = _range.unpack_from
+        table = self._base + d['text_offsets']
+        offset = self._base + d['text']
+
+        spans = [unpack(mm, table + 4 * i) for i in ids]
+        texts = [mm[offset + start:offset + end] for start, end in spans]
+        if d['unicode']:
+            texts = [t.decode('utf-8') for t in texts]
+
+        return texts
+
+    def record(self, i):
+        '''
+        Return the record.
+
+        Args:
+            i (int): record number.
+
+        Returns:
+            tuple or dict: record.
+        '''
+        return marshal.loads(self._get('record', i))
+
+    def _candidates(self, query):
+        mm = self._open()
+        postings = self._directory['postings']
+
+        rarest = None
+        for ch in set(query.lower()):
+            posting = postings.get(ch)
+            if posting is None:
+                return []
+            if rarest is None or posting[1] < rarest[1]:
+                rarest = posting
+
+        return _unpack(mm, self._base + rarest[0], rarest[1])
+
+    def _load_state(self):
+        try:
+            with open(self._state_path, 'rb') as f:
+                return marshal.loads(f.read())
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise
+        except (EOFError, ValueError, TypeError):
+            # broken state is ignored.
+            pass
+
+        return None
+
+    def _save_state(self, matcher, ids):
+        query = matcher.query
+        if not matcher.case_sensitive:
+            query = query.lower()
+
+        state = marshal.dumps({'id': self._directory['id'],
+                               'query': query,
+                               'case_sensitive': matcher.case_sensitive,
+                               'ids': _pack(ids)})
+
+        fd, tmp = _mkstemp(os.path.dirname(os.path.abspath(self._path)))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(state)
+        os.rename(tmp, self._state_path)
+
+    def _refine(self, matcher):
+        # matches of previous query are a superset of matches of the
+        # query which extends it.
+        state = self._load_state()
+        if not state or state['id'] != self._directory['id']:
+            return None
+
+        # matches of case sensitive query are not a superset.
+        if state['case_sensitive'] and not matcher.case_sensitive:
+            return None
+
+        query = matcher.query
+        if not state['case_sensitive']:
+            query = query.lower()
+        if not _is_subsequence(state['query'], query):
+            return None
+
+        ids = state['ids']
+        return _unpack(ids, 0, len(ids) // 4)
+
+    def search(self, query, limit=20, case_sensitive=None):
+        '''
+        Return matched records in order of score.
+
+        Args:
+            query (str): query.
+            limit (int, optional): maximum number of results.
+                If it is None, all matched records are returned.
+            case_sensitive (bool, optional):
+                Refer to **FuzzyMatcher** about it.
+
+        Returns:
+            list of tuple: (score, record).
+        '''
+        self._open()
+
+        if not query:
+            count = len(self)
+            if limit is not None:
+                count = min(count, limit)
+            return [(0.0, self.record(i)) for i in range(count)]
+
+        matcher = FuzzyMatcher(query, case_sensitive)
+
+        ids = self._refine(matcher)
+        if ids is None:
+            ids = self._candidates(query)
+
+        texts = self._texts(ids)
+        matched = []
+        results = matcher.search(range(len(ids)), key=texts.__getitem__,
+                                 limit=limit, matched=matched)
+        self._save_state(matcher, [ids[j] for j in matched])
+
+        return [(s, self.record(ids[j])) for s, j in results]
+
+    def extend_matches(self, manager, query, limit=20, case_sensitive=None):
+        '''
+        Append records which match the query to ScriptFilterManager
+        in order of score.
+
+        Args:
+            manager (ScriptFilterManager): manager.
+            query (str): query.
+            limit (int, optional): maximum number of items.
+            case_sensitive (bool, optional):
+                Refer to **FuzzyMatcher** about it.
+
+        Returns:
+            int: number of appended items.
+        '''
+        results = self.search(query, limit, case_sensitive)
+        manager.extend_items(r for _, r in results)
+
+        return len(results)
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+import re
+import heapq
+import itertools
+
+
+_separators = ' -_/.\\:'
+
+# bonus of score.
+_start_bonus = 3.0
+_boundary_bonus = 2.5
+_camel_bonus = 2.0
+_consecutive_bonus = 2.5
+_case_bonus = 0.2
+
+# penalty of score.
+_gap_penalty = 0.05
+_max_gap_penalty = 1.0
+_length_penalty = 0.01
+
+# number of candidates, under which parallel_search runs serially.
+_parallel_threshold = 100000
+
+
+def _title(record):
+    '''Return title of a record of ScriptFilterManager.extend_items.'''
+    return record['title'] if isinstance(record, dict) else record[0]
+
+
+class FuzzyMatcher(object):
+    '''
+    Subsequence matcher with ranking.
+    A candidate matches if all characters of the query appear in it in
+    order. Score is high when matched characters are at the start of the
+    candidate, at word boundaries (after separators or camelCase humps,
+    so initials match well), consecutive, or in the same case.
+    Short candidate is preferred.
+
+        Examples::
+
+            matcher = FuzzyMatcher('pf')
+            matcher.score('python-alfred-workflows')  # => 4.77
+            matcher.search(['python-alfred-workflows', 'pdf'], limit=20)
+
+    Args:
+        query (str): query.
+        case_sensitive (bool, optional): If it is None, matching is case
+            sensitive only when query contains upper case characters.
+    '''
+    def __init__(self, query, case_sensitive=None):
+        if case_sensitive is None:
+            case_sensitive = query != query.lower()
+
+        q = query if case_sensitive else query.lower()
+
+        self._query = query
+        self._folded_query = q
+        self._case_sensitive = case_sensitive
+
+        # the first character is not grouped, so that the regular
+        # expression engine can scan the literal quickly. Negated classes
+        # never backtrack.
+        pattern = re.escape(q[:1])
+        for ch in q[1:]:
+            ch = re.escape(ch)
+            pattern += '[^' + ch + '\n]*(' + ch + ')'
+
+        self._search = re.compile(pattern).search
+        # for all candidates joined with new line, the rest of line is
+        # consumed so that each line matches once at most.
+        self._finditer = re.compile(pattern + '[^\n]*').finditer
+
+        # upper bound of score except length penalty, without and with
+        # camelCase humps. Only the first character can get start bonus.
+        # Consecutive character can be at a boundary only if the previous
+        # character of query is a separator.
+        self._max_score = self._max_camel_score = \
+            len(q) * (1.0 + _case_bonus) + _start_bonus
+        for before in q[:-1]:
+            boundary = _boundary_bonus if before in _separators else 0.0
+            self._max_score += max(_consecutive_bonus + boundary,
+                                   _boundary_bonus)
+            self._max_camel_score += max(
+                _consecutive_bonus + max(boundary, _camel_bonus),
+                _boundary_bonus)
+
+    @property
+    def query(self):
+        return self._query
+
+    @property
+    def case_sensitive(self):
+        return self._case_sensitive
+
+    def _fold(self, candidate):
+        return candidate if self._case_sensitive else candidate.lower()
+
+    def _tighten(self, folded, positions, head):
+        # the leftmost match may be loose, such as "pf" in "tmp/pf".
+        # Scan backward from the last matched character.
+        q = self._folded_query
+        if positions[-1] - positions[0] < len(q):
+            return positions
+
+        pos = positions[-1]
+        tightened = [pos]
+        for i in range(len(q) - 2, -1, -1):
+            pos = folded.rfind(q[i], head, pos)
+            tightened.append(pos)
+        tightened.reverse()
+
+        return tightened
+
+    def _score(self, candidate, positions):
+        score = -_length_penalty * len(candidate)
+        prev = -2
+
+        for pos, q in zip(positions, self._query):
+            ch = candidate[pos]
+            score += 1.0 + _case_bonus if ch == q else 1.0
+
+            if pos == prev + 1:
+                score += _consecutive_bonus
+            elif prev >= 0:
+                score -= min(_gap_penalty * (pos - prev - 1),
+                             _max_gap_penalty)
+
+            if pos == 0:
+                score += _start_bonus
+            else:
+                before = candidate[pos - 1]
+                if before in _separators:
+                    score += _boundary_bonus
+                elif before.islower() and ch.isupper():
+                    score += _camel_bonus
+
+            prev = pos
+
+        return score
+
+    def score(self, candidate):
+        '''
+        Return score of the candidate.
+
+        Args:
+            candidate (str): candidate text.
+
+        Returns:
+            float: score. If the candidate doesn't match, return None.
+        '''
+        if not self._query:
+            return 0.0
+
+        folded = self._fold(candidate)
+        m = self._search(folded)
+        if m is None:
+            return None
+
+        # the whole match starts at the first character.
+        positions = self._tighten(folded, [r[0] for r in m.regs], 0)
+
+        return self._score(candidate, positions)
+
+    def _join(self, candidates, key):
+        texts = candidates if key is None else list(map(key, candidates))
+
+        joined = '\n'.join(texts)
+        if joined.count('\n') >= len(texts):
+            # new line in candidate breaks the line of the candidate.
+            texts = [t.replace('\n', ' ') for t in texts]
+            joined = '\n'.join(texts)
+        folded = self._fold(joined)
+
+        # lower() may change length of some unicode characters.
+        return texts, joined, folded, len(folded) == len(joined)
+
+    def search(self, candidates, key=None, limit=20, matched=None):
+        '''
+        Return matched candidates in order of score.
+        Only top **limit** candidates are kept in a heap, so the
+        candidates are not sorted entirely.
+
+        Args:
+            candidates (iterable): candidates.
+            key (callable, optional): function which returns text of
+                candidate. Default is candidate itself.
+            limit (int, optional): maximum number of results.
+                If it is None, all matched candidates are returned.
+            matched (list, optional): If it is given, all matched
+                candidates are appended to it in input order. They are
+                not scored except top results, so it is cheap.
+
+        Returns:
+            list of tuple: (score, candidate). Ties keep input order.
+        '''
+        if limit == 0 and matched is None:
+            return []
+
+        if not self._query:
+            if matched is not None:
+                candidates = list(candidates)
+                matched.extend(candidates)
+            results = candidates if limit is None else \
+                itertools.islice(candidates, limit)
+            return [(0.0, c) for c in results]
+
+        candidates = list(candidates)
+        texts, joined, folded, exact = self._join(candidates, key)
+
+        max_score = self._max_score
+        max_camel_score = self._max_camel_score
+        start_bonus = _start_bonus - _boundary_bonus
+        heap = []
+        index = 0
+        last = 0
+
+        # candidates which don't match are skipped in regular expression
+        # engine, so they cost little.
+        for m in self._finditer(folded):
+            start = m.start()
+            head = folded.rfind('\n', 0, start) + 1
+
+            index += folded.count('\n', last, start)
+            last = start
+            if matched is not None:
+                matched.append(candidates[index])
+
+            if limit is not None and len(heap) >= limit:
+                if not limit:
+                    continue
+
+                end = m.end()
+                line = joined[head:end]
+                # camelCase needs upper case character.
+                bound = max_camel_score if line != line.lower() \
+                    else max_score
+                bound -= _length_penalty * (end - head)
+                if start != head:
+                    bound -= start_bonus
+                if exact and bound < heap[0][0]:
+                    continue
+
+            text = texts[index]
+            if exact:
+                positions = self._tighten(
+                    folded, [r[0] for r in m.regs], head)
+                positions = [pos - head for pos in positions]
+            else:
+                f = self._fold(text)
+                positions = self._tighten(
+                    f, [r[0] for r in self._search(f).regs], 0)
+
+            entry = (self._score(text, positions), -index, candidates[index])
+            if limit is None:
+                heap.append(entry)
+
+            elif len(heap) < limit:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heappushpop(heap, entry)
+
+        results = sorted(heap, reverse=True)
+        return [(s, c) for s, _, c in results]
+
+
+def search(query, candidates, key=None, limit=20, case_sensitive=None):
+    '''
+    Return matched candidates in order of score.
+    Refer to **FuzzyMatcher.search** about arguments.
+
+    Returns:
+        list of tuple: (score, candidate).
+    '''
+    return FuzzyMatcher(query, case_sensitive).search(candidates, key, limit)
+
+
+# texts which worker processes of a new pool inherit by fork.
+_shared_texts = None
+
+
+def _search_shard(args):
+    query, case_sensitive, texts, start, end, limit = args
+    if texts is None:
+        texts = _shared_texts[start:end]
+
+    results = FuzzyMatcher(query, case_sensitive).search(
+        range(len(texts)), key=texts.__getitem__, limit=limit)
+
+    return [(score, start + i) for score, i in results]
+
+
+def parallel_search(query, candidates, key=None, limit=20,
+                    case_sensitive=None, processes=None,
+                    threshold=_parallel_threshold, pool=None):
+    '''
+    Return matched candidates in order of score, scoring shards of the
+    candidates in a process pool. Only texts of the candidates are sent
+    to worker processes, and top results of each shard are merged.
+    If the number of candidates is less than **threshold**, or only one
+    process is available, they are scored in this process.
+
+    A new pool inherits the texts when its processes are forked. An
+    existing pool receives the texts through pipes, which costs about as
+    much as scoring them, so it is useful only with many CPUs.
+
+        Examples::
+
+            with closing(multiprocessing.Pool()) as pool:
+                # pool is reused for each query.
+                parallel_search(query, paths, pool=pool)
+
+    Args:
+        query (str): query.
+        candidates (iterable): candidates.
+        key (callable, optional): function which returns text of
+            candidate. Default is candidate itself.
+        limit (int, optional): maximum number of results.
+            If it is None, all matched candidates are returned.
+        case_sensitive (bool, optional):
+            Refer to **FuzzyMatcher** about it.
+        processes (int, optional): number of shards and processes.
+            Default is number of CPUs.
+        threshold (int, optional): minimum number of candidates to run in
+            parallel.
+        pool (multiprocessing.Pool, optional): pool of worker processes.
+            Default is a new pool, which is terminated after search.
+
+    Returns:
+        list of tuple: (score, candidate). Ties keep input order.
+    '''
+    import multiprocessing
+
+    candidates = list(candidates)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    if len(candidates) < threshold or processes < 2 or not query:
+        return search(query, candidates, key, limit, case_sensitive)
+
+    texts = candidates if key is None else list(map(key, candidates))
+    size = -(-len(texts) // processes)
+    ranges = [(i, min(i + size, len(texts)))
+              for i in range(0, len(texts), size)]
+
+    if pool is None:
+        global _shared_texts
+
+        # workers are forked after texts are shared, so texts are not
+        # sent through pipes. (except Windows)
+        _shared_texts = texts
+        own = multiprocessing.Pool(processes)
+        try:
+            results = own.map(_search_shard, [
+                (query, case_sensitive, None, start, end, limit)
+                for start, end in ranges])
+        finally:
+            own.terminate()
+            _shared_texts = None
+    else:
+        results = pool.map(_search_shard, [
+            (query, case_sensitive, texts[start:end], start, end, limit)
+            for start, end in ranges])
+
+    merged = itertools.chain.from_iterable(results)
+    merged = sorted(merged, key=lambda e: (-e[0], e[1])) if limit is None \
+        else heapq.nsmallest(limit, merged, key=lambda e: (-e[0], e[1]))
+
+    return [(score, candidates[i]) for score, i in merged]
+
+
+def extend_matches(manager, query, records, key=_title, limit=20,
+                   case_sensitive=None, processes=1):
+    '''
+    Append records which match the query to ScriptFilterManager
+    in order of score.
+
+        Examples::
+
+            extend_matches(manager, query,
+                           ((path, 'icon.png') for path in paths))
+
+    Args:
+        manager (ScriptFilterManager): manager.
+        query (str): query.
+        records (iterable): records of **ScriptFilterManager.extend_items**.
+        key (callable, optional): function which returns text of record.
+            Default is title of record.
+        limit (int, optional): maximum number of items.
+        case_sensitive (bool, optional):
+            Refer to **FuzzyMatcher** about it.
+        processes (int, optional): If it is not 1, records are scored in
+            parallel by **parallel_search**. None means number of CPUs.
+
+    Returns:
+        int: number of appended items.
+    '''
+    if processes == 1:
+        results = search(query, records, key, limit, case_sensitive)
+    else:
+        results = parallel_search(query, records, key, limit,
+                                  case_sensitive, processes)
+    manager.extend_items(r for _, r in results)
+
+    return len(results)
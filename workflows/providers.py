@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+import traceback
+
+
+class _Task(threading.Thread):
+    def __init__(self, provider, cancel):
+        super(_Task, self).__init__()
+        # late provider must not keep the script filter alive.
+        self.daemon = True
+        self.provider = provider
+        self.cancel = cancel
+        self.records = None
+
+    def run(self):
+        try:
+            self.records = list(self.provider(self.cancel))
+        except Exception:
+            traceback.print_exc()
+
+
+def gather(manager, providers, timeout=0.5):
+    '''
+    Run result providers concurrently, and append their records to
+    ScriptFilterManager in priority order. Total latency is the slowest
+    provider within **timeout**, not the sum of them.
+
+    A provider is a callable which takes a threading.Event and returns
+    records of **ScriptFilterManager.extend_items**. The event is set when
+    the deadline passes, so a slow provider should check it (ex. by
+    **cancel.wait(seconds)** instead of sleep) and give up. Records of a
+    provider which doesn't finish by the deadline are dropped, and a
+    provider which raises an exception is skipped.
+
+        Examples::
+
+            def bookmarks(cancel):
+                return [(b.title, 'icon.png', b.url) for b in load(query)]
+
+            def history(cancel):
+                for url in search_history(query):
+                    if cancel.is_set():
+                        break
+                    yield (url, 'icon.png', url)
+
+            gather(manager, [bookmarks, history], timeout=0.3)
+
+    Args:
+        manager (ScriptFilterManager): manager.
+        providers (list of callable): providers in priority order.
+        timeout (float, optional): seconds until the deadline.
+
+    Returns:
+        list of callable: providers which didn't finish by the deadline.
+    '''
+    deadline = time.time() + timeout
+    cancel = threading.Event()
+
+    tasks = [_Task(p, cancel) for p in providers]
+    for t in tasks:
+        t.start()
+
+    for t in tasks:
+        t.join(max(deadline - time.time(), 0))
+
+    late = [t for t in tasks if t.is_alive()]
+    cancel.set()
+
+    for t in tasks:
+        if t not in late and t.records is not None:
+            manager.extend_items(t.records)
+
+    return [t.provider for t in late]
@@ -1,12 +1,76 @@
 # -*- coding: utf-8 -*-
-import uuid
-from .commons.xml_tree import Element
+import os
+import sys
+from .commons.xml_tree import Element, iterparse
+
+
+def uuid_uid(item):
+    '''
+    UID strategy which returns uuid1. This is default strategy.
+    It changes every time, so Alfred can't learn the order of results.
+
+    Args:
+        item (Item): target item.
+
+    Returns:
+        str: uid.
+    '''
+    import uuid
+    return str(uuid.uuid1())
+
+
+def hash_uid(item):
+    '''
+    UID strategy which returns hash of title and arg.
+    It is stable across runs.
+
+    Args:
+        item (Item): target item.
+
+    Returns:
+        str: uid.
+    '''
+    import hashlib
+
+    title = None
+    for se in item.sub_elements:
+        if isinstance(se, Title):
+            title = se.text
+            break
+
+    h = hashlib.sha1()
+    for v in (title, item.arg):
+        if v is not None:
+            h.update(v if isinstance(v, bytes) else v.encode('utf-8'))
+        h.update(b'\0')
+
+    return h.hexdigest()
+
+
+class CounterUid(object):
+    '''
+    UID strategy which returns sequential number.
+    It is stable across runs if results are returned in the same order.
+
+    Args:
+        start (int, optional): first number.
+    '''
+    def __init__(self, start=0):
+        import itertools
+        self._counter = itertools.count(start)
+
+    def __call__(self, item):
+        return str(next(self._counter))
 
 
 class Title(Element):
     '''Title element. This element is child node of **Item**.'''
     __element_name__ = 'title'
 
+    def update_json(self, item):
+        '''Set title to item dict of JSON format.'''
+        item['title'] = self.text
+
 
 class SubTitle(Element):
     '''Subtitle element. This element is child node of **Item**.'''
@@ -17,14 +81,21 @@ class SubTitle(Element):
 
     @property
     def mod(self):
-        return self.__mod
+        return self._mod
 
     @mod.setter
     def mod(self, mod):
         if mod not in self._mod_defs:
             raise ValueError('mod must be {0}'.format(self._mod_defs))
 
-        self.__mod = mod
+        self._mod = mod
+
+    def update_json(self, item):
+        '''Set subtitle or mod to item dict of JSON format.'''
+        if self.mod is None:
+            item['subtitle'] = self.text
+        else:
+            item.setdefault('mods', {})[self.mod] = {'subtitle': self.text}
 
 
 class Icon(Element):
@@ -36,14 +107,22 @@ class Icon(Element):
 
     @property
     def type(self):
-        return self.__type
+        return self._type
 
     @type.setter
     def type(self, type):
         if type not in self._type_defs:
             raise ValueError('type must be {0}'.format(self._type_defs))
 
-        self.__type = type
+        self._type = type
+
+    def update_json(self, item):
+        '''Set icon to item dict of JSON format.'''
+        icon = {'path': self.text}
+        if self.type is not None:
+            icon['type'] = self.type
+
+        item['icon'] = icon
 
 
 class Text(Element):
@@ -55,14 +134,20 @@ class Text(Element):
 
     @property
     def type(self):
-        return self.__type
+        return self._type
 
     @type.setter
     def type(self, type):
         if type not in self._type_defs:
             raise ValueError('type must be {0}'.format(self._type_defs))
 
-        self.__type = type
+        self._type = type
+
+    def update_json(self, item):
+        '''Set text to item dict of JSON format.'''
+        # JSON format has no text without type.
+        if self.type is not None:
+            item.setdefault('text', {})[self.type] = self.text
 
 
 class Item(Element):
@@ -71,22 +156,48 @@ class Item(Element):
     __attributes__ = ['uid', 'arg', 'valid', 'autocomplete', 'type']
     __sub_elements__ = [Title, SubTitle, Icon, Text]
 
+    __slots__ = ['_uid_strategy']
+
     _valid_defs = [True, False, None]
 
+    def __init__(self, text=None, uid_strategy=uuid_uid, **kwargs):
+        '''
+        Args:
+            text (str, optional): text content.
+            uid_strategy (callable, optional):
+                function which returns uid from item, if uid is not
+                specified. It is called lazily when uid is required.
+                If it is None, uid is omitted.
+        '''
+        self._uid_strategy = uid_strategy
+        super(Item, self).__init__(text, **kwargs)
+
+    @classmethod
+    def _from_attributes(cls, text, attributes):
+        valid = attributes.get('valid')
+        if valid is not None:
+            attributes = dict(attributes, valid=valid.lower() == 'yes')
+
+        i = super(Item, cls)._from_attributes(text, attributes)
+        # uid of parsed item is not generated.
+        i._uid_strategy = None
+
+        return i
+
     @property
     def uid(self):
-        return self.__uid
+        if self._uid is None and self._uid_strategy is not None:
+            self._uid = self._uid_strategy(self)
+
+        return self._uid
 
     @uid.setter
     def uid(self, uid):
-        if uid:
-            self.__uid = uid
-        else:
-            self.__uid = str(uuid.uuid1())
+        self._uid = uid if uid else None
 
     @property
     def valid(self):
-        return self.__valid
+        return self._valid
 
     @valid.setter
     def valid(self, valid):
@@ -94,11 +205,64 @@ class Item(Element):
             raise ValueError('valid must be {0}'.format(self._valid_defs))
 
         if valid is True:
-            self.__valid = 'YES'
+            self._valid = 'YES'
         elif valid is False:
-            self.__valid = 'no'
+            self._valid = 'no'
         else:
-            self.__valid = None
+            self._valid = None
+
+    def todict(self):
+        '''
+        Return item as dict of Alfred's script filter JSON format.
+
+        Returns:
+            dict: item.
+        '''
+        item = self.attributes
+        if 'valid' in item:
+            item['valid'] = item['valid'] == 'YES'
+
+        for se in self.sub_elements:
+            se.update_json(item)
+
+        return item
+
+
+class StaticItem(Item):
+    '''
+    Item which holds serialized XML and JSON dict only.
+    It is created by **ScriptFilterManager.append_static**.
+    '''
+    __element_name__ = 'item'
+
+    __slots__ = ['_dict']
+
+    @classmethod
+    def _frozen(cls, fragment, d):
+        i = cls._bare()
+        i._fragment = fragment
+        i._dict = d
+        i._uid_strategy = None
+        i._uid = d.get('uid')
+        i.arg = d.get('arg')
+        i._valid = {True: 'YES', False: 'no'}.get(d.get('valid'))
+        i.autocomplete = d.get('autocomplete')
+        i.type = d.get('type')
+
+        return i
+
+    def todict(self):
+        '''
+        Return item as dict of Alfred's script filter JSON format.
+
+        Returns:
+            dict: item.
+        '''
+        return dict(self._dict)
+
+
+# static items of this process. {name: list of StaticItem}
+_static_items = {}
 
 
 class Items(Element):
@@ -106,6 +270,88 @@ class Items(Element):
     __element_name__ = 'items'
     __sub_elements__ = [Item]
 
+    def todict(self):
+        '''
+        Return items as dict of Alfred's script filter JSON format.
+
+        Returns:
+            dict: items.
+        '''
+        return {'items': [i.todict() for i in self.sub_elements]}
+
+
+def iterparse_items(source):
+    '''
+    Parse script filter xml incrementally, and yield items one at a time
+    with their titles, sub titles, icons and texts. Memory doesn't grow
+    with the document, so large cached output can be filtered or
+    re-ranked without loading it entirely.
+
+        Examples::
+
+            manager.extend_elements(
+                i for i in iterparse_items('cached.xml')
+                if query in i.find(Title).text)
+
+    Args:
+        source (str or file): file name or file-like object of xml.
+
+    Yields:
+        Item: item. Its uid is not generated if it is not in the xml.
+    '''
+    return iterparse(source, Item)
+
+
+class ItemTemplate(object):
+    '''
+    Prototype of items which share the icon, valid, type and sub titles
+    of modifier keys (flyweight). The shared elements are created and
+    serialized once, and every item stamped out by
+    **ScriptFilterManager.append_templated** refers to them. Output is
+    the same as items appended by **append_item** and
+    **append_subtitle**.
+
+        Examples::
+
+            template = ItemTemplate('icon.png', valid=True,
+                                    cmd='Reveal in Finder')
+            for path in paths:
+                manager.append_templated(template, path, arg=path)
+
+    Args:
+        icon_path_or_name (str): icon path or name.
+        icon_type (str, optional): loading type of the icon.
+        valid (bool, optional): If valid is False, it won't be actioned.
+        is_file (bool, optional): item is treated as file.
+        shift (str, optional): sub title text when shift is pressed.
+        fn (str, optional): sub title text when fn is pressed.
+        ctrl (str, optional): sub title text when ctrl is pressed.
+        alt (str, optional): sub title text when alt is pressed.
+        cmd (str, optional): sub title text when cmd is pressed.
+
+    Raises:
+        ValueError: If valid or icon_type is invalid.
+    '''
+    def __init__(self, icon_path_or_name, icon_type=None, valid=None,
+                 is_file=False, shift=None, fn=None, ctrl=None, alt=None,
+                 cmd=None):
+        if valid not in Item._valid_defs:
+            raise ValueError('valid must be {0}'.format(Item._valid_defs))
+
+        self._valid = 'YES' if valid is True else \
+            'no' if valid is False else None
+        self._type = 'file' if is_file else None
+
+        # elements after title and sub title, in order of append_item and
+        # append_subtitle.
+        tail = [Icon(icon_path_or_name, type=icon_type)]
+        for mod, text in [('shift', shift), ('fn', fn), ('ctrl', ctrl),
+                          ('alt', alt), ('cmd', cmd)]:
+            if text is not None:
+                tail.append(SubTitle(text, mod=mod))
+
+        self._tail = [e.freeze() for e in tail]
+
 
 class ScriptFilterManager(object):
     '''
@@ -118,6 +364,14 @@ class ScriptFilterManager(object):
 
             manager = ScriptFilterManager()
 
+       uid of item which is appended without uid is generated by
+       **uid_strategy**. Default is uuid1. If you want stable uids,
+       use hash_uid or CounterUid. If it is None, uid is omitted.
+
+        Examples:
+
+            manager = ScriptFilterManager(uid_strategy=hash_uid)
+
     2. Append result item.
        One item corresponds to the Alfred's results of the one line.
 
@@ -149,9 +403,50 @@ class ScriptFilterManager(object):
             #         <icon type="fileicon">~/Desktop</title>
             #     </item>
             # </items>
+
+       Or write items to stdout while appending them (streaming mode).
+
+        Examples::
+
+            with manager.streaming():
+                for path in walk():
+                    manager.append_item(path, path)
+
+       Or rank items by score, and keep only top **max_items** of them.
+       Records of the rest are discarded without creating items.
+
+        Examples::
+
+            manager = ScriptFilterManager(
+                max_items=20, more=lambda n: ('{0} more...'.format(n),
+                                              'icon.png'))
+            for path in walk():
+                manager.append_ranked(score(path), (path, path))
+
+    Args:
+        uid_strategy (callable, optional): function which returns uid of
+            the item.
+        max_items (int, optional): maximum number of ranked items.
+            If it is None, all ranked items are kept.
+        more (callable, optional): function called with the number of
+            discarded ranked items, which returns a record of
+            **extend_items** for a summary item. It is appended after
+            the ranked items if some of them are discarded.
     '''
-    def __init__(self):
+    def __init__(self, uid_strategy=uuid_uid, max_items=None, more=None):
         self._items = Items()
+        self._uid_strategy = uid_strategy
+        self._stream = None
+        self._streamed = 0
+        self._max_items = max_items
+        self._more = more
+        self._ranked = []
+        self._discarded = 0
+        self._order = 0
+        # {uid: index} of items which are not written yet, built at the
+        # first lookup by uid.
+        self._uid_index = None
+        self._uid_indexed = 0
 
     def tostring(self):
         '''
@@ -160,8 +455,262 @@ class ScriptFilterManager(object):
         Returns:
             str: script filter.
         '''
-        import xml.etree.ElementTree as etree
-        return etree.tostring(self._items.build())
+        self._materialize_ranked()
+        return self._items.tostring()
+
+    def tojson(self, rerun=None, variables=None):
+        '''
+        Return script filter JSON as string. (Alfred 3 later)
+
+        Args:
+            rerun (float, optional): seconds after which Alfred reruns the
+                script filter with the same query. (0.1 to 5.0)
+            variables (dict, optional): variables which are passed to
+                the rerun and the following actions.
+
+        Returns:
+            str: script filter.
+
+        Raises:
+            ValueError: rerun is out of range.
+        '''
+        import json
+
+        self._materialize_ranked()
+        d = self._items.todict()
+        if rerun is not None:
+            if not 0.1 <= rerun <= 5.0:
+                raise ValueError('rerun must be 0.1 to 5.0 seconds.')
+            d['rerun'] = rerun
+        if variables:
+            d['variables'] = variables
+
+        return json.dumps(d, separators=(',', ':'))
+
+    def run_budgeted(self, records, budget, cache, workflow, query,
+                     rerun=0.5, variables=None, fp=None):
+        '''
+        Append records within **budget** seconds, and write script filter
+        JSON. If the records are not exhausted by then, the items
+        appended so far are written with rerun, and the rest are appended
+        in a background process, which stores full output to **cache**.
+        Alfred reruns the script filter, and the rerun returns the cached
+        full output. So perceived latency is bounded by the budget and
+        output of the items appended in it, however large the data source
+        is.
+
+        The background process is forked, so **records** must not depend
+        on other threads. While it is running, a rerun writes partial
+        output again without starting another one.
+
+            Examples::
+
+                cache = ResultCache(ttl=60)
+                manager.run_budgeted(
+                    ((p, 'icon.png') for p in walk(query)), 0.2,
+                    cache, 'my.workflow', query)
+
+        Args:
+            records (iterable): records of **extend_items**.
+                Generator is preferred, so that slow work is deferred.
+            budget (float): seconds until partial output.
+            cache (ResultCache or MappedResultCache): cache of full output.
+            workflow (str): workflow name of the cache. (ex. bundle id)
+            query (str): query of the cache.
+            rerun (float, optional): seconds of rerun. (0.1 to 5.0)
+            variables (dict, optional): variables of script filter JSON.
+            fp (file, optional): file-like object. Default is sys.stdout.
+
+        Returns:
+            bool: True if the output is full.
+        '''
+        fp = sys.stdout if fp is None else fp
+
+        data = cache.get(workflow, query)
+        if data is not None:
+            fp.write(data)
+            return True
+
+        import time
+
+        deadline = time.time() + budget
+        records = iter(records)
+        exhausted = []
+
+        def until_deadline():
+            for r in records:
+                yield r
+                if time.time() >= deadline:
+                    return
+            exhausted.append(True)
+
+        self.extend_items(until_deadline())
+
+        if exhausted:
+            data = self.tojson(variables=variables)
+            cache.set(workflow, query, data)
+            fp.write(data)
+            return True
+
+        fp.write(self.tojson(rerun=rerun, variables=variables))
+        fp.flush()
+
+        # marker of the background process. It expires with the cache
+        # entry, if the process dies.
+        pending = query + '\0pending'
+        if cache.get(workflow, pending) is None:
+            cache.set(workflow, pending, str(os.getpid()))
+            self._finish_in_background(records, cache, workflow, query,
+                                       variables)
+
+        return False
+
+    def _finish_in_background(self, records, cache, workflow, query,
+                              variables):
+        pid = os.fork()
+        if pid:
+            os.waitpid(pid, 0)
+            return
+
+        # daemonize by double fork. Alfred waits until stdout is closed,
+        # so standard streams are detached.
+        status = 1
+        try:
+            os.setsid()
+            if os.fork():
+                status = 0
+                return
+
+            null = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(null, fd)
+            # don't slow down the next script filter run by Alfred.
+            os.nice(10)
+
+            self.extend_items(records)
+            cache.set(workflow, query, self.tojson(variables=variables))
+            status = 0
+        finally:
+            os._exit(status)
+
+    def write(self, fp):
+        '''
+        Write script filter xml to file-like object (ex. sys.stdout).
+
+        Args:
+            fp (file): file-like object which has write method.
+        '''
+        self._materialize_ranked()
+        self._items.write(fp)
+
+    def streaming(self, fp=None):
+        '''
+        Write script filter xml incrementally while appending items.
+        Root element is written at the beginning, each item is written
+        when next item is appended, and root element is closed at the end.
+        So extension methods can be used for the last appended item only.
+
+        Args:
+            fp (file, optional): file-like object. Default is sys.stdout.
+
+        Returns:
+            context manager: it yields ScriptFilterManager (self).
+        '''
+        # contextlib is imported only when streaming is used.
+        from contextlib import contextmanager
+        return contextmanager(self._streaming)(fp)
+
+    def _streaming(self, fp):
+        if fp is None:
+            fp = sys.stdout
+
+        fp.write('<items>')
+        self._stream = fp
+        self._flush_items()
+
+        try:
+            yield self
+        finally:
+            self._materialize_ranked()
+            self._flush_items()
+            self._stream = None
+            fp.write('</items>')
+            self._flush_stream()
+
+    def _flush_items(self, keep=0):
+        '''Write appended items to stream except last **keep** items.'''
+        items = self._items.sub_elements
+        count = len(items) - keep
+        if count <= 0:
+            return
+
+        # uids of written items are forgotten, so that the index doesn't
+        # grow with the number of items.
+        if self._uid_index is not None:
+            self._unindex_uids(count)
+
+        for i in items[:count]:
+            i.write(self._stream)
+        del items[:count]
+        self._streamed += count
+        self._flush_stream()
+
+    def _flush_stream(self):
+        flush = getattr(self._stream, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def _item(self, index):
+        '''
+        Return appended item by index or uid. Written items in streaming
+        mode are lost.
+        '''
+        if isinstance(index, basestring):
+            index = self._index_of(index)
+
+        if index >= 0:
+            index -= self._streamed
+            if index < 0:
+                raise IndexError('item was written to stream, already.')
+
+        return self._items.sub_elements[index]
+
+    def _unindex_uids(self, count):
+        '''Remove uids of the first **count** items which will be written.'''
+        index = self._uid_index
+        items = self._items.sub_elements
+        streamed = self._streamed
+        indexed = self._uid_indexed - streamed
+
+        for pos in range(min(indexed, count)):
+            uid = items[pos].uid
+            if index.get(uid) == streamed + pos:
+                del index[uid]
+
+        # following items of the same uid are found instead.
+        for pos in range(count, indexed):
+            index.setdefault(items[pos].uid, streamed + pos)
+
+    def _index_of(self, uid):
+        '''Return index of the first item of the uid.'''
+        index = self._uid_index
+        if index is None:
+            index = self._uid_index = {}
+
+        # items appended after the previous lookup are indexed.
+        items = self._items.sub_elements
+        streamed = self._streamed
+        end = streamed + len(items)
+        if self._uid_indexed < end:
+            for pos in range(max(self._uid_indexed - streamed, 0),
+                             len(items)):
+                index.setdefault(items[pos].uid, streamed + pos)
+            self._uid_indexed = end
+
+        try:
+            return index[uid]
+        except KeyError:
+            raise KeyError('item of uid {0!r} is not found.'.format(uid))
 
     def append_item(self, title, icon_path_or_name,
                     subtitle=None, uid=None, arg=None, valid=None,
@@ -186,27 +735,321 @@ class ScriptFilterManager(object):
                 filetype: load file type from icon name.
             is_file (bool, optional): item is treated as file.
         '''
-        item_attrs = {
-            'uid': uid,
-            'arg': arg,
-            'valid': valid,
-            'autocomplete': autocomplete,
-            'type': 'file' if is_file else None
-        }
+        self._items.append(self._make_item(
+            title, icon_path_or_name, subtitle, uid, arg, valid,
+            autocomplete, icon_type, is_file
+        ))
 
-        icon_attrs = {
-            'type': icon_type
-        }
+        if self._stream is not None:
+            self._flush_items(keep=1)
+
+    def append_templated(self, template, title, subtitle=None, uid=None,
+                         arg=None, autocomplete=None):
+        '''
+        Add Alfred's result item which shares the elements of
+        **template**. This is a basic method API.
+
+        Args:
+            template (ItemTemplate): template of item.
+            title (str): title text.
+            subtitle (str, optional): sub title text.
+            uid (str, optional): unique id of item
+            arg (str, optional): arg of item.
+            autocomplete (str, optional):
+                If you select the item, this string is complemented in Alfred.
+        '''
+        self._items.append(self._make_templated(
+            template, title, subtitle, uid, arg, autocomplete))
 
-        i = Item(**item_attrs)
-        i.append(Title(title))
+        if self._stream is not None:
+            self._flush_items(keep=1)
+
+    def extend_templated(self, template, records):
+        '''
+        Add Alfred's result items which share the elements of
+        **template** in bulk. This is a basic method API.
+
+        Each record is arguments of **append_templated** except template.
+        It is one of tuple, dict or namedtuple as **extend_items**.
+
+        Args:
+            template (ItemTemplate): template of items.
+            records (iterable): records of items. It can be a generator.
+        '''
+        make = self._make_templated
+        items = self._items.sub_elements
+        stream = self._stream
+
+        for r in records:
+            if isinstance(r, dict):
+                items.append(make(template, **r))
+            elif hasattr(r, '_asdict'):
+                items.append(make(template, **r._asdict()))
+            else:
+                items.append(make(template, *r))
+
+            if stream is not None:
+                self._flush_items(keep=1)
+
+    def _make_templated(self, template, title, subtitle=None, uid=None,
+                        arg=None, autocomplete=None):
+        i = Item._bare()
+        i._uid_strategy = self._uid_strategy
+        i._uid = uid if uid else None
+        i.arg = arg
+        i._valid = template._valid
+        i.autocomplete = autocomplete
+        i.type = template._type
+
+        sub_elements = i.sub_elements
+        sub_elements.append(Title._bare(title))
 
         if subtitle is not None:
-            i.append(SubTitle(subtitle))
+            st = SubTitle._bare(subtitle)
+            st._mod = None
+            sub_elements.append(st)
 
-        i.append(Icon(icon_path_or_name, **icon_attrs))
+        sub_elements.extend(template._tail)
 
-        self._items.append(i)
+        return i
+
+    def append_static(self, name, fill, directory=None):
+        '''
+        Add fixed items (ex. menu, help, "open settings"), which are
+        serialized once and spliced into output as they are.
+        They are cached in this process and in **directory**, so later
+        keystrokes don't build or escape them again.
+
+            Examples::
+
+                def menu(manager):
+                    manager.append_item('Settings', 'icon.png', arg='set')
+                    manager.append_item('Help', 'icon.png', arg='help')
+
+                manager.append_static('menu-v1', menu)
+
+        Args:
+            name (str): name of static items. Change it when the items are
+                changed.
+            fill (callable): function called with ScriptFilterManager
+                which appends the static items. It is called only when
+                they are not cached.
+            directory (str, optional): directory of on-disk cache. Default
+                is cache directory of the workflow. If it is False, items
+                are cached only in this process.
+        '''
+        items = _static_items.get(name)
+        if items is None:
+            items = self._load_static(name, fill, directory)
+            _static_items[name] = items
+
+        self._items.sub_elements.extend(items)
+
+        if self._stream is not None:
+            self._flush_items(keep=1)
+
+    def _load_static(self, name, fill, directory):
+        import marshal
+
+        path = None
+        if directory is not False:
+            import hashlib
+            from .cache import default_cache_dir
+
+            directory = directory or default_cache_dir()
+            key = name.encode('utf-8') if not isinstance(name, bytes) \
+                else name
+            path = os.path.join(directory, 'static-{0}.marshal'.format(
+                hashlib.sha1(key).hexdigest()))
+
+            try:
+                with open(path, 'rb') as f:
+                    frozen = marshal.loads(f.read())
+                return [StaticItem._frozen(x, d) for x, d in frozen]
+            except (IOError, OSError, EOFError, ValueError, TypeError):
+                # not cached or broken.
+                pass
+
+        manager = ScriptFilterManager(uid_strategy=self._uid_strategy)
+        fill(manager)
+
+        frozen = []
+        for i in manager._items.sub_elements:
+            # uid is generated by serialization, so it is the same in both
+            # formats.
+            x = i.freeze()._fragment
+            frozen.append((x, i.todict()))
+
+        if path is not None:
+            from .cache import _mkstemp
+
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            fd, tmp = _mkstemp(directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(marshal.dumps(frozen))
+            os.rename(tmp, path)
+
+        return [StaticItem._frozen(x, d) for x, d in frozen]
+
+    def extend_items(self, records):
+        '''
+        Add Alfred's result items in bulk. This is a basic method API.
+
+        Each record is arguments of **append_item**.
+        It is one of tuple (positional arguments), dict (keyword arguments)
+        or namedtuple (fields are used as keyword arguments).
+
+        Examples:
+
+            manager.extend_items([
+                ('Desktop', '~/Desktop', '~/Desktop'),
+                {'title': 'Home', 'icon_path_or_name': '~/', 'valid': True},
+            ])
+
+        Args:
+            records (iterable): records of items. It can be a generator.
+        '''
+        make_item = self._make_item
+        items = self._items.sub_elements
+        stream = self._stream
+
+        for r in records:
+            if isinstance(r, dict):
+                items.append(make_item(**r))
+            elif hasattr(r, '_asdict'):
+                items.append(make_item(**r._asdict()))
+            else:
+                items.append(make_item(*r))
+
+            if stream is not None:
+                self._flush_items(keep=1)
+
+    def append_ranked(self, score, record):
+        '''
+        Add a record of item with score. This is a basic method API.
+        Ranked items are appended in order of score (ties keep input
+        order) after the other items, when output is made. Only top
+        **max_items** records are kept in a heap, so items of the other
+        records are never created and memory stays constant.
+
+        Extension methods can't be used for ranked items until output is
+        made, because their index is not fixed.
+
+            Examples::
+
+                manager.append_ranked(4.5, ('Desktop', '~/Desktop'))
+
+        Args:
+            score (float): score. High score is ranked first.
+            record (tuple or dict or namedtuple): record of
+                **extend_items**.
+        '''
+        self._order += 1
+        entry = (score, -self._order, record)
+        heap = self._ranked
+        limit = self._max_items
+
+        if limit is None:
+            heap.append(entry)
+            return
+
+        import heapq
+        if len(heap) < limit:
+            heapq.heappush(heap, entry)
+        else:
+            self._discarded += 1
+            if heap and entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    def extend_ranked(self, scored_records):
+        '''
+        Add records of items with scores in bulk. Refer to
+        **append_ranked** about ranking.
+
+            Examples::
+
+                from workflows.matching import search
+
+                manager.extend_ranked(search(query, records, key=title,
+                                             limit=None))
+
+        Args:
+            scored_records (iterable): tuples of (score, record).
+        '''
+        for score, record in scored_records:
+            self.append_ranked(score, record)
+
+    def _materialize_ranked(self):
+        '''Create items of ranked records, and a summary item.'''
+        if not self._ranked and not self._discarded:
+            return
+
+        # input order is unique, so records are never compared.
+        ranked = sorted(self._ranked, reverse=True)
+        records = [r for _, _, r in ranked]
+        if self._discarded and self._more is not None:
+            records.append(self._more(self._discarded))
+
+        self._ranked = []
+        self._discarded = 0
+        self.extend_items(records)
+
+    def extend_elements(self, items):
+        '''
+        Add Item elements in bulk (ex. items of **iterparse_items**).
+        This is a basic method API.
+
+        Args:
+            items (iterable): Item elements. It can be a generator.
+
+        Raises:
+            TypeError: If an element is not Item.
+        '''
+        append = self._items.append
+        stream = self._stream
+
+        for i in items:
+            append(i)
+            if stream is not None:
+                self._flush_items(keep=1)
+
+    def _make_item(self, title, icon_path_or_name,
+                   subtitle=None, uid=None, arg=None, valid=None,
+                   autocomplete=None, icon_type=None, is_file=False):
+        '''
+        Create item. Refer to **append_item** about arguments.
+        Values are validated here, and elements are created without
+        __init__ and property setters because this is the hot path.
+        '''
+        if valid not in Item._valid_defs:
+            raise ValueError('valid must be {0}'.format(Item._valid_defs))
+
+        if icon_type not in Icon._type_defs:
+            raise ValueError('type must be {0}'.format(Icon._type_defs))
+
+        i = Item._bare()
+        i._uid_strategy = self._uid_strategy
+        i._uid = uid if uid else None
+        i.arg = arg
+        i._valid = 'YES' if valid is True else 'no' if valid is False else None
+        i.autocomplete = autocomplete
+        i.type = 'file' if is_file else None
+
+        sub_elements = i.sub_elements
+        sub_elements.append(Title._bare(title))
+
+        if subtitle is not None:
+            st = SubTitle._bare(subtitle)
+            st._mod = None
+            sub_elements.append(st)
+
+        icon = Icon._bare(icon_path_or_name)
+        icon._type = icon_type
+        sub_elements.append(icon)
+
+        return i
 
     def append_subtitle(self, index, subtitle,
                         shift=None, fn=None, ctrl=None, alt=None, cmd=None):
@@ -215,7 +1058,7 @@ class ScriptFilterManager(object):
         This is an extension method API.
 
         Args:
-            index (int): item index.
+            index (int or str): item index, or uid of the item.
             subtitle (str): sub title text.
             shift (str, optional): sub title text when shift is pressed.
             fn (str, optional): sub title text when fn is pressed.
@@ -224,25 +1067,27 @@ class ScriptFilterManager(object):
             cmd (str, optional): sub title text when cmd is pressed.
 
         Raises:
-            ValueError: If subtitle is added in specified item, already.
+            ValueError: If sub title of the same modifier is added in
+                specified item, already.
+            IndexError: If specified item was written in streaming mode.
+            KeyError: If item of the uid is not found. In streaming
+                mode, written items are not found by uid.
         '''
-        i = self._items.sub_elements[index]
+        i = self._item(index)
 
-        if SubTitle in i.sub_elements:
-            raise ValueError('Subtitle element exist.')
+        subtitles = ((None, subtitle), ('shift', shift), ('fn', fn),
+                     ('ctrl', ctrl), ('alt', alt), ('cmd', cmd))
 
-        if subtitle is not None:
-            i.append(SubTitle(subtitle))
-        if shift is not None:
-            i.append(SubTitle(shift, mod='shift'))
-        if fn is not None:
-            i.append(SubTitle(fn, mod='fn'))
-        if ctrl is not None:
-            i.append(SubTitle(ctrl, mod='ctrl'))
-        if alt is not None:
-            i.append(SubTitle(alt, mod='alt'))
-        if cmd is not None:
-            i.append(SubTitle(cmd, mod='cmd'))
+        exist = [st.mod for st in i.findall(SubTitle)]
+        for mod, text in subtitles:
+            if text is not None and mod in exist:
+                raise ValueError('Subtitle element exist.')
+
+        for mod, text in subtitles:
+            if text is not None:
+                st = SubTitle._bare(text)
+                st._mod = mod
+                i.append(st)
 
     def append_text(self, index, copy=None, largetype=None):
         '''
@@ -250,20 +1095,28 @@ class ScriptFilterManager(object):
         This is an extension method API.
 
         Args:
-            index (int): item index.
+            index (int or str): item index, or uid of the item.
             copy (str, optional): text when coping.
             largetype (str, optional): text for LargeType.
 
         Raises:
-            ValueError: If text is added in specified item, already.
+            ValueError: If text of the same type is added in specified
+                item, already.
+            IndexError: If specified item was written in streaming mode.
+            KeyError: If item of the uid is not found. In streaming
+                mode, written items are not found by uid.
         '''
-        item = self._items.sub_elements[index]
+        item = self._item(index)
 
-        if Text in item.sub_elements:
-            raise ValueError('Text element exist.')
+        texts = (('copy', copy), ('largetype', largetype))
 
-        if copy is not None:
-            item.append(Text(copy, type='copy'))
+        exist = [t.type for t in item.findall(Text)]
+        for type, text in texts:
+            if text is not None and type in exist:
+                raise ValueError('Text element exist.')
 
-        if largetype is not None:
-            item.append(Text(largetype, type='largetype'))
+        for type, text in texts:
+            if text is not None:
+                t = Text._bare(text)
+                t._type = type
+                item.append(t)
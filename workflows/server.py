@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import errno
+import select
+import socket
+import traceback
+from .script_filter import ScriptFilterManager
+
+
+def module_files(directory):
+    '''
+    Return source files of loaded modules under **directory**.
+
+    Args:
+        directory (str): directory path.
+
+    Returns:
+        list of str: file paths.
+    '''
+    directory = os.path.join(os.path.abspath(directory), '')
+    files = []
+
+    for m in list(sys.modules.values()):
+        path = getattr(m, '__file__', None)
+        if not path:
+            continue
+
+        path = os.path.abspath(path)
+        if path.endswith(('.pyc', '.pyo')):
+            path = path[:-1]
+
+        if path.startswith(directory):
+            files.append(path)
+
+    return files
+
+
+class ScriptFilterServer(object):
+    '''
+    Long-lived server of a script filter, listening on Unix domain socket.
+    It keeps imported modules and user data loaded, so each keystroke
+    doesn't pay for Python startup. Use **workflows.client** to forward
+    the query from Alfred.
+
+    For each connection, the query is read until the client shuts down
+    writing, **fill** appends items to a new ScriptFilterManager, and the
+    output is streamed back.
+
+    The server stops when no connection arrives in **idle_timeout**
+    seconds, or when watched files are changed. In the latter case the
+    connection is closed without response, so the client starts a new
+    server with new code.
+
+        Examples::
+
+            def fill(manager, query):
+                for path in search(query):
+                    manager.append_item(path, path)
+
+            ScriptFilterServer(fill, '/tmp/my.workflow.sock').serve_forever()
+
+    Args:
+        fill (callable): function called with ScriptFilterManager and
+            query, which appends items to the manager.
+        socket_path (str): path of Unix domain socket.
+        idle_timeout (float, optional): seconds until server stops.
+        watch (list of str, optional): files which restart the server
+            when they are changed. Default is source files of modules
+            loaded from current directory (workflow directory).
+        tojson (bool, optional): If it is True, output is JSON format.
+    '''
+    def __init__(self, fill, socket_path, idle_timeout=300, watch=None,
+                 tojson=False):
+        self._fill = fill
+        self._socket_path = socket_path
+        self._idle_timeout = idle_timeout
+        self._watch = (module_files(os.getcwd()) if watch is None
+                       else list(watch))
+        self._tojson = tojson
+        self._mtimes = self._stat()
+        self._socket = None
+        self._inode = None
+
+    def _stat(self):
+        mtimes = {}
+        for path in self._watch:
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                mtimes[path] = None
+
+        return mtimes
+
+    def changed(self):
+        '''
+        Return True if watched files were changed after server started.
+
+        Returns:
+            bool: changed or not.
+        '''
+        return self._stat() != self._mtimes
+
+    def bind(self):
+        '''
+        Listen on the socket. A stale socket file is replaced.
+
+        Returns:
+            bool: False if other server is listening on the socket already.
+        '''
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.bind(self._socket_path)
+        except socket.error as e:
+            if e.errno != errno.EADDRINUSE:
+                s.close()
+                raise
+
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self._socket_path)
+                s.close()
+                return False
+            except socket.error:
+                os.remove(self._socket_path)
+                s.bind(self._socket_path)
+            finally:
+                probe.close()
+
+        s.listen(8)
+        self._socket = s
+        self._inode = os.stat(self._socket_path).st_ino
+
+        return True
+
+    def serve_forever(self):
+        '''Serve until idle timeout or change of watched files.'''
+        if self._socket is None and not self.bind():
+            return
+
+        listener = self._socket
+        try:
+            while True:
+                try:
+                    readable, _, _ = select.select([listener], [], [],
+                                                   self._idle_timeout)
+                    if not readable:
+                        break
+
+                    conn, _ = listener.accept()
+                except (select.error, socket.error):
+                    # closed by other thread.
+                    if self._socket is None:
+                        break
+                    raise
+
+                try:
+                    if self.changed():
+                        break
+                    self.handle(conn)
+                except Exception:
+                    traceback.print_exc()
+                finally:
+                    conn.close()
+        finally:
+            self.close()
+
+    def handle(self, conn):
+        '''
+        Read query from connection, and write output of script filter.
+
+        Args:
+            conn (socket.socket): connection of client.
+        '''
+        chunks = []
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                break
+            chunks.append(data)
+        query = b''.join(chunks)
+
+        fp = conn.makefile('wb')
+        try:
+            manager = ScriptFilterManager()
+            if self._tojson:
+                self._fill(manager, query)
+                fp.write(manager.tojson())
+            else:
+                with manager.streaming(fp):
+                    self._fill(manager, query)
+        except socket.error as e:
+            # client has gone. (ex. Alfred killed it by next keystroke)
+            if e.errno not in (errno.EPIPE, errno.ECONNRESET):
+                raise
+        finally:
+            try:
+                fp.close()
+            except socket.error:
+                pass
+
+    def close(self):
+        '''Stop listening. And remove the socket file if it is own.'''
+        if self._socket is None:
+            return
+
+        self._socket.close()
+        self._socket = None
+
+        try:
+            # new server may have created the socket file already.
+            if os.stat(self._socket_path).st_ino == self._inode:
+                os.remove(self._socket_path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+
+def run(fill, socket_path, argv=None, **kwargs):
+    '''
+    Entry point of server script. Server is started by the client with
+    "--serve" option. Otherwise the query is handled in this process,
+    which is the fallback of the client.
+
+        Examples::
+
+            # server.py
+            if __name__ == '__main__':
+                run(fill, '/tmp/my.workflow.sock')
+
+    Args:
+        fill (callable): function called with ScriptFilterManager and
+            query, which appends items to the manager.
+        socket_path (str): path of Unix domain socket.
+        argv (list of str, optional): arguments. Default is sys.argv[1:].
+        kwargs: keyword arguments of ScriptFilterServer.
+    '''
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv and argv[0] == '--serve':
+        ScriptFilterServer(fill, socket_path, **kwargs).serve_forever()
+        return
+
+    manager = ScriptFilterManager()
+    fill(manager, argv[0] if argv else '')
+    sys.stdout.write(manager.tojson() if kwargs.get('tojson')
+                     else manager.tostring())
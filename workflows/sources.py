@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import select
+import subprocess
+
+
+def command_lines(args, timeout=None, cwd=None, env=None):
+    '''
+    Run a command, and yield lines of its stdout as they arrive.
+    Output is not buffered entirely, so the first line is available
+    before the command finishes, and memory doesn't grow with output.
+    The command is killed when the generator is closed (ex. by break) or
+    the deadline passes. stderr of the command is discarded.
+
+        Examples::
+
+            for line in command_lines(['mdfind', '-name', query],
+                                      timeout=1.0):
+                print(line)
+
+    Args:
+        args (list of str): command and its arguments.
+        timeout (float, optional): seconds until the deadline. Lines
+            which arrive after it are dropped.
+        cwd (str, optional): working directory of the command.
+        env (dict, optional): environment variables of the command.
+
+    Yields:
+        str: line without line terminator.
+    '''
+    deadline = None if timeout is None else time.time() + timeout
+
+    with open(os.devnull, 'wb') as null:
+        p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=null,
+                             cwd=cwd, env=env)
+    fd = p.stdout.fileno()
+    rest = b''
+
+    try:
+        while True:
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return
+                readable, _, _ = select.select([fd], [], [], remaining)
+                if not readable:
+                    return
+
+            # read what is available, not until buffer is full.
+            data = os.read(fd, 65536)
+            if not data:
+                if rest:
+                    yield rest.rstrip(b'\r')
+                return
+
+            lines = (rest + data).split(b'\n')
+            rest = lines.pop()
+            for line in lines:
+                yield line.rstrip(b'\r')
+    finally:
+        if p.poll() is None:
+            p.kill()
+        p.stdout.close()
+        p.wait()
+
+
+def extend_command(manager, args, record, limit=20, timeout=None,
+                   cwd=None, env=None):
+    '''
+    Run a command, and append an item for each line of its stdout to
+    ScriptFilterManager as the line arrives. The command is killed once
+    **limit** items are appended, or when the deadline passes.
+
+    In streaming mode of the manager, each item is written as soon as
+    its line arrives.
+
+        Examples::
+
+            def record(line):
+                return (os.path.basename(line), line, line, None, line,
+                        True, None, 'fileicon', True)
+
+            extend_command(manager, ['mdfind', '-name', query], record,
+                           limit=20, timeout=1.0)
+
+    Args:
+        manager (ScriptFilterManager): manager.
+        args (list of str): command and its arguments.
+        record (callable): function which takes a line and returns a
+            record of **ScriptFilterManager.extend_items**. If it returns
+            None, the line is skipped.
+        limit (int, optional): maximum number of items.
+            If it is None, items are appended until the command exits.
+        timeout (float, optional): seconds until the deadline.
+        cwd (str, optional): working directory of the command.
+        env (dict, optional): environment variables of the command.
+
+    Returns:
+        int: number of appended items.
+    '''
+    if limit == 0:
+        return 0
+
+    lines = command_lines(args, timeout, cwd, env)
+    appended = [0]
+
+    def records():
+        for line in lines:
+            r = record(line)
+            if r is None:
+                continue
+
+            appended[0] += 1
+            yield r
+            if appended[0] == limit:
+                return
+
+    try:
+        manager.extend_items(records())
+    finally:
+        lines.close()
+
+    return appended[0]